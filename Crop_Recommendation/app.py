@@ -12,9 +12,11 @@ import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.neighbors import KDTree
 import joblib
 import matplotlib.pyplot as plt
 import requests
+import hashlib
 import base64
 import matplotlib
 matplotlib.use('Agg')
@@ -34,9 +36,96 @@ def fetch_seasonal_data(latitude, longitude):
 def convert_rainfall_value(rainfall_value):
     return rainfall_value * 1000
 
+# Function to average the seasonal forecast for a location over its months
+def seasonal_averages(latitude, longitude):
+    """
+    Fetches the seasonal forecast for the next 183 days and returns the average of its
+    monthly averages as (temperature, humidity, rainfall), or None without data.
+    """
+    seasonal_data = fetch_seasonal_data(latitude, longitude)
+    
+    if seasonal_data:
+        # Extract all timestamps from the data
+        times = seasonal_data['six_hourly']['time']
+        # Convert timestamps to datetime objects
+        time_dates = [datetime.strptime(time, "%Y-%m-%dT%H:%M") for time in times]
+
+        # Group data by month
+        monthly_data = {}
+        for i, time_date in enumerate(time_dates):
+            month_key = time_date.strftime("%Y-%m")  # Group by year and month (e.g., "2023-10")
+
+            if month_key not in monthly_data:
+                monthly_data[month_key] = {
+                    "temps": [],
+                    "humidity": [],
+                    "rainfall": []
+                }
+
+            # Extract temperature, humidity, and rainfall for the current timestamp
+            for member in ['temperature_2m_member01', 'temperature_2m_member02', 'temperature_2m_member03', 'temperature_2m_member04']:
+                temp = seasonal_data['six_hourly'][member][i]
+                if temp is not None:
+                    monthly_data[month_key]["temps"].append(temp)
+
+            for member in ['relative_humidity_2m_member01', 'relative_humidity_2m_member02', 'relative_humidity_2m_member03', 'relative_humidity_2m_member04']:
+                humid = seasonal_data['six_hourly'][member][i]
+                if humid is not None:
+                    monthly_data[month_key]["humidity"].append(humid)
+
+            for member in ['precipitation_member01', 'precipitation_member02', 'precipitation_member03', 'precipitation_member04']:
+                rain = seasonal_data['six_hourly'][member][i]
+                if rain is not None:
+                    monthly_data[month_key]["rainfall"].append(convert_rainfall_value(rain))  # Multiply rainfall by 1000
+
+        # Calculate monthly averages
+        monthly_averages = {}
+        for month_key, values in monthly_data.items():
+            avg_temp = sum(values["temps"]) / len(values["temps"]) if values["temps"] else 0
+            avg_humidity = sum(values["humidity"]) / len(values["humidity"]) if values["humidity"] else 0
+            avg_rainfall = sum(values["rainfall"]) / len(values["rainfall"]) if values["rainfall"] else 0
+
+            monthly_averages[month_key] = {
+                "avg_temp": avg_temp,
+                "avg_humidity": avg_humidity,
+                "avg_rainfall": avg_rainfall
+            }
+
+        # Calculate the average of the monthly averages
+        num_months = len(monthly_averages)
+        if num_months > 0:
+            avg_of_avg_temp = sum(month["avg_temp"] for month in monthly_averages.values()) / num_months
+            avg_of_avg_humidity = sum(month["avg_humidity"] for month in monthly_averages.values()) / num_months
+            avg_of_avg_rainfall = sum(month["avg_rainfall"] for month in monthly_averages.values()) / num_months
+
+            return avg_of_avg_temp, avg_of_avg_humidity, avg_of_avg_rainfall
+    return None
+
 # Function to get soil data using default values
 
 
+DATASET_PATH = 'recommend_vision.csv'
+FEATURE_COLUMNS = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+MODEL_PATH = 'crop_recommendation_model.pkl'
+# Location whose seasonal forecast is used when a request doesn't give one
+DEFAULT_LATITUDE = 19.0760
+DEFAULT_LONGITUDE = 72.8777
+# Samples x dataset rows affinity values computed at a time by the batch endpoint
+AFFINITY_CHUNK_CELLS = 4_000_000
+MAX_BATCH_SAMPLES = 10000
+# "exact" sums affinity over every dataset row; "knn" and "radius" sum it over the
+# nearest rows found with a KD-tree and estimate the rest (see indexed_yield_scores).
+# More neighbors / a larger radius is more accurate and slower.
+SCORING_MODES = ('exact', 'knn', 'radius')
+CROP_SCORING = os.environ.get('CROP_SCORING', 'exact')
+CROP_SCORING_NEIGHBORS = int(os.environ.get('CROP_SCORING_NEIGHBORS', '256'))
+CROP_SCORING_RADIUS = float(os.environ.get('CROP_SCORING_RADIUS', '0.3'))
+# Weight of the RandomForest / GradientBoosting predict_proba in the crop scores, against
+# the affinity sums (0 = affinity only). RF inference runs on CROP_RF_JOBS cores (-1 = all).
+CROP_MODEL_WEIGHT = float(os.environ.get('CROP_MODEL_WEIGHT', '0'))
+CROP_RF_JOBS = int(os.environ.get('CROP_RF_JOBS', '-1'))
+
+
 # Class to handle crop recommendation model
 class CropRecommendationModel:
     def __init__(self):
@@ -55,7 +144,7 @@ class CropRecommendationModel:
             return None
 
     def train_model(self, dataset):
-        features = dataset[['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']]
+        features = dataset[FEATURE_COLUMNS]
         labels = dataset['label']
         X_train, X_test, y_train, y_test = train_test_split(features, labels, test_size=0.2, random_state=42)
 
@@ -81,45 +170,215 @@ class CropRecommendationModel:
         joblib.dump(model_components, save_path)
         print("Model saved successfully.")
 
+    def dataset_hash(self, file_path):
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def load_or_train(self, dataset_path, save_path):
+        """
+        Loads the dataset and the saved model components, retraining (and saving) them
+        only when the saved model is missing or was trained on a different dataset.
+        Returns (model_components, dataset), or (None, None) if the dataset can't be read.
+        """
+        dataset = self.load_dataset_from_drive(dataset_path)
+        if dataset is None:
+            return None, None
+
+        dataset_hash = self.dataset_hash(dataset_path)
+        if os.path.exists(save_path):
+            try:
+                model_components = joblib.load(save_path)
+                if model_components.get('dataset_hash') == dataset_hash:
+                    print("Model loaded successfully.")
+                    return model_components, dataset
+                print("Saved model was trained on a different dataset; retraining.")
+            except Exception as e:
+                print(f"Error loading model: {e}")
+
+        model_components = self.train_model(dataset)
+        model_components['dataset_hash'] = dataset_hash
+        self.save_model(model_components, save_path)
+        return model_components, dataset
+
 # Class to handle crop recommendations
 class CropRecommendationPredictor:
-    def __init__(self, model_components):
+    def __init__(self, model_components, scoring='exact', neighbors=256, radius=0.3, model_weight=0.0, rf_jobs=-1):
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"scoring must be one of {', '.join(SCORING_MODES)}")
+        if not 0 <= model_weight <= 1:
+            raise ValueError("model_weight must be between 0 and 1")
         self.model_rf = model_components['model_rf']
+        self.model_rf.n_jobs = rf_jobs
         self.model_gb = model_components['model_gb']
         self.scaler = model_components['scaler']
         self.unique_crops = model_components['unique_crops']
+        self.scoring = scoring
+        self.neighbors = neighbors
+        self.radius = radius
+        self.model_weight = model_weight
+        self._dataset_features = None
+        self._dataset_index = None
+
+    def normalize(self, values):
+        """Min-max scales rows of FEATURE_COLUMNS values with the fitted scaler, as float32."""
+        values = np.asarray(values, dtype=np.float64)
+        return (values * self.scaler.scale_ + self.scaler.min_).astype(np.float32)
+
+    def dataset_features(self, dataset):
+        """
+        (normalized feature matrix, label codes, label names, first row of each label) for
+        dataset, with rows ordered by label. Computed once and reused while the same
+        dataset is passed in; the dataset itself is never modified.
+        """
+        cached = self._dataset_features
+        if cached is None or cached[0] is not dataset:
+            codes, labels = pd.factorize(dataset['label'], sort=True)
+            order = np.argsort(codes, kind='stable')
+            codes = codes[order]
+            features = self.normalize(dataset[FEATURE_COLUMNS].values[order])
+            starts = np.searchsorted(codes, np.arange(len(labels)))
+            cached = (dataset, features, codes, labels, starts)
+            self._dataset_features = cached
+        return cached[1:]
+
+    def dataset_index(self, dataset):
+        """
+        (KD-tree over the normalized features, per-label centroids, per-label mean squared
+        distance to the centroid, per-label row counts) for dataset, built once like
+        dataset_features.
+        """
+        cached = self._dataset_index
+        if cached is None or cached[0] is not dataset:
+            features, codes, _, starts = self.dataset_features(dataset)
+            counts = np.diff(np.append(starts, len(features)))
+            centroids = np.add.reduceat(features, starts, axis=0, dtype=np.float64) / counts[:, None]
+            spreads = np.add.reduceat(((features - centroids[codes]) ** 2).sum(axis=1), starts, dtype=np.float64) / counts
+            cached = (dataset, KDTree(features), centroids, spreads, counts)
+            self._dataset_index = cached
+        return cached[1:]
+
+    def model_probabilities(self, model, inputs_normalized, labels):
+        """model.predict_proba for a batch of samples, as (samples x labels); 0 for crops the model doesn't know."""
+        probabilities = model.predict_proba(inputs_normalized.astype(np.float64))
+        columns = pd.Index(model.classes_).get_indexer(labels)
+        return np.where(columns >= 0, probabilities[:, columns], 0)
+
+    def combined_scores(self, yield_scores, inputs_normalized, labels):
+        """
+        Per-crop scores (samples x crops) with the best crop at 95: the average of an RF and
+        a GB score, each the affinity sums blended with that model's predict_proba by
+        model_weight.
+        """
+        affinity = yield_scores / yield_scores.max(axis=1, keepdims=True)
+        if self.model_weight == 0:
+            # Both scores are the affinity sum, so their average is too
+            return affinity * 95
+
+        scores = []
+        for model in (self.model_rf, self.model_gb):
+            probabilities = self.model_probabilities(model, inputs_normalized, labels)
+            probabilities = probabilities / probabilities.max(axis=1, keepdims=True)
+            scores.append(((1 - self.model_weight) * affinity + self.model_weight * probabilities) * 95)
+        return (scores[0] + scores[1]) / 2
+
+    def top_crops(self, combined_scores, labels):
+        """Top 4 crops from per-crop combined scores, with the remaining 5% spread over all crops."""
+        remaining_percentage = 5
+        remaining_scores = (combined_scores / combined_scores.sum()) * remaining_percentage
+        final_scores = pd.Series(combined_scores + remaining_scores, index=labels)
+
+        return final_scores.sort_values(ascending=False).head(4)
 
     def get_crop_recommendations(self, input_data, dataset):
-        features = dataset[['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']]
-        features_normalized = self.scaler.transform(features)
+        if self.scoring != 'exact':
+            return self.get_crop_recommendations_batch([[input_data[column] for column in FEATURE_COLUMNS]], dataset)[0]
 
-        input_features = np.array([input_data['N'], input_data['P'], input_data['K'],
-                                   input_data['temperature'], input_data['humidity'],
-                                   input_data['ph'], input_data['rainfall']])
-        input_normalized = self.scaler.transform([input_features])[0]
+        features_normalized, label_codes, labels, _ = self.dataset_features(dataset)
+        input_normalized = self.normalize([input_data[column] for column in FEATURE_COLUMNS])
 
         distances = np.linalg.norm(features_normalized - input_normalized, axis=1)
         affinity_scores = 1 / (1 + distances)
-        dataset['affinity_score'] = affinity_scores
-
-        yield_scores_rf = dataset.groupby('label')['affinity_score'].sum()
-        max_score_rf = yield_scores_rf.max()
-        scaled_scores_rf = (yield_scores_rf / max_score_rf) * 95
+        # Affinity summed per crop
+        yield_scores = np.bincount(label_codes, weights=affinity_scores, minlength=len(labels))
 
-        yield_scores_gb = dataset.groupby('label')['affinity_score'].sum()
-        max_score_gb = yield_scores_gb.max()
-        scaled_scores_gb = (yield_scores_gb / max_score_gb) * 95
-
-        combined_scores = (scaled_scores_rf + scaled_scores_gb) / 2
-        remaining_percentage = 5
-        combined_scores = combined_scores.sort_values(ascending=False)
-        remaining_scores = (combined_scores / combined_scores.sum()) * remaining_percentage
-        final_scores = combined_scores + remaining_scores
-
-        top_4_crops = final_scores.sort_values(ascending=False).head(4)
+        combined_scores = self.combined_scores(yield_scores[None], input_normalized[None], labels)[0]
+        top_4_crops = self.top_crops(combined_scores, labels)
 
         return top_4_crops
 
+    def exact_yield_scores(self, inputs_normalized, dataset, chunk_cells=AFFINITY_CHUNK_CELLS):
+        """
+        Per-crop affinity sums (samples x crops) over every dataset row. The samples x
+        dataset rows affinity matrix is computed chunk_cells values at a time to bound memory.
+        """
+        features_normalized, _, labels, label_starts = self.dataset_features(dataset)
+        chunk_size = max(1, chunk_cells // len(features_normalized))
+
+        yield_scores = np.empty((len(inputs_normalized), len(labels)))
+        for start in range(0, len(inputs_normalized), chunk_size):
+            chunk = inputs_normalized[start:start + chunk_size]
+            # Squared distances accumulated feature by feature, so only (chunk x rows) is allocated
+            squared = np.zeros((len(chunk), len(features_normalized)), dtype=np.float32)
+            for j in range(len(FEATURE_COLUMNS)):
+                squared += (features_normalized[:, j] - chunk[:, j, None]) ** 2
+            affinity_scores = 1 / (1 + np.sqrt(squared))
+            # Rows are ordered by label, so each crop's sum is one contiguous segment
+            yield_scores[start:start + chunk_size] = np.add.reduceat(affinity_scores, label_starts, axis=1, dtype=np.float64)
+        return yield_scores
+
+    def indexed_yield_scores(self, inputs_normalized, dataset):
+        """
+        Approximate per-crop affinity sums (samples x crops) from a KD-tree query: the
+        `neighbors` nearest rows ("knn") or the rows within `radius` ("radius") are summed
+        exactly. Every other row of a crop is counted as lying at the root-mean-square
+        distance of those rows from the sample (at least the query bound), which follows
+        from the crop's centroid and spread minus the rows already summed.
+        """
+        _, label_codes, labels, _ = self.dataset_features(dataset)
+        index, centroids, spreads, label_counts = self.dataset_index(dataset)
+        n_samples, n_labels = len(inputs_normalized), len(labels)
+
+        if self.scoring == 'knn':
+            k = min(self.neighbors, len(label_codes))
+            distances, indices = index.query(inputs_normalized, k=k)
+            bound = distances[:, -1]
+            sample_rows = np.repeat(np.arange(n_samples), k)
+            indices, distances = indices.ravel(), distances.ravel()
+        else:
+            indices, distances = index.query_radius(inputs_normalized, r=self.radius, return_distance=True)
+            bound = np.full(n_samples, self.radius)
+            sample_rows = np.repeat(np.arange(n_samples), [len(found) for found in indices])
+            indices, distances = np.concatenate(indices).astype(np.intp), np.concatenate(distances)
+
+        cells = sample_rows * n_labels + label_codes[indices]
+        near_scores = np.bincount(cells, weights=1 / (1 + distances), minlength=n_samples * n_labels)
+        near_counts = np.bincount(cells, minlength=n_samples * n_labels).reshape(n_samples, n_labels)
+        near_squared = np.bincount(cells, weights=distances ** 2, minlength=n_samples * n_labels).reshape(n_samples, n_labels)
+
+        # Mean squared distance to a crop's rows = squared distance to its centroid + its spread
+        centroid_squared = ((inputs_normalized[:, None, :] - centroids[None]) ** 2).sum(axis=2)
+        far_counts = label_counts - near_counts
+        far_squared = (label_counts * (centroid_squared + spreads) - near_squared) / np.maximum(far_counts, 1)
+        far_distances = np.maximum(np.sqrt(np.maximum(far_squared, 0)), bound[:, None])
+        far_scores = far_counts / (1 + far_distances)
+        return near_scores.reshape(n_samples, n_labels) + far_scores
+
+    def get_crop_recommendations_batch(self, inputs, dataset, chunk_cells=AFFINITY_CHUNK_CELLS):
+        """
+        get_crop_recommendations for each row of inputs (samples x FEATURE_COLUMNS), as a
+        list of Series.
+        """
+        _, _, labels, _ = self.dataset_features(dataset)
+        inputs_normalized = self.normalize(inputs).reshape(-1, len(FEATURE_COLUMNS))
+
+        if self.scoring == 'exact':
+            yield_scores = self.exact_yield_scores(inputs_normalized, dataset, chunk_cells)
+        else:
+            yield_scores = self.indexed_yield_scores(inputs_normalized, dataset)
+
+        combined_scores = self.combined_scores(yield_scores, inputs_normalized, labels)
+        return [self.top_crops(scores, labels) for scores in combined_scores]
+
     def visualize_recommendations(self, recommendations):
         plt.figure(figsize=(10, 6))
         plt.pie(recommendations, labels=recommendations.index, autopct='%1.1f%%')
@@ -135,8 +394,8 @@ def dothething(nitrogen, phosphorus, potassium,
               iron, copper, zinc, ph):
     
     # Input latitude and longitude
-    latitude = 19.0760
-    longitude = 72.8777
+    latitude = DEFAULT_LATITUDE
+    longitude = DEFAULT_LONGITUDE
 
     # Create soil_data dictionary from parameters
     soil_data = {
@@ -153,85 +412,16 @@ def dothething(nitrogen, phosphorus, potassium,
     }
 
     # Fetch seasonal data for the next 183 days
-    
-    seasonal_data = fetch_seasonal_data(latitude, longitude)
-    
-    if seasonal_data:
-            # Extract all timestamps from the data
-            times = seasonal_data['six_hourly']['time']
-            # Convert timestamps to datetime objects
-            time_dates = [datetime.strptime(time, "%Y-%m-%dT%H:%M") for time in times]
-
-            # Group data by month
-            monthly_data = {}
-            for i, time_date in enumerate(time_dates):
-                month_key = time_date.strftime("%Y-%m")  # Group by year and month (e.g., "2023-10")
-
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {
-                        "temps": [],
-                        "humidity": [],
-                        "rainfall": []
-                    }
-
-                # Extract temperature, humidity, and rainfall for the current timestamp
-                for member in ['temperature_2m_member01', 'temperature_2m_member02', 'temperature_2m_member03', 'temperature_2m_member04']:
-                    temp = seasonal_data['six_hourly'][member][i]
-                    if temp is not None:
-                        monthly_data[month_key]["temps"].append(temp)
-
-                for member in ['relative_humidity_2m_member01', 'relative_humidity_2m_member02', 'relative_humidity_2m_member03', 'relative_humidity_2m_member04']:
-                    humid = seasonal_data['six_hourly'][member][i]
-                    if humid is not None:
-                        monthly_data[month_key]["humidity"].append(humid)
-
-                for member in ['precipitation_member01', 'precipitation_member02', 'precipitation_member03', 'precipitation_member04']:
-                    rain = seasonal_data['six_hourly'][member][i]
-                    if rain is not None:
-                        monthly_data[month_key]["rainfall"].append(convert_rainfall_value(rain))  # Multiply rainfall by 1000
-
-            # Calculate monthly averages
-            monthly_averages = {}
-            for month_key, values in monthly_data.items():
-                avg_temp = sum(values["temps"]) / len(values["temps"]) if values["temps"] else 0
-                avg_humidity = sum(values["humidity"]) / len(values["humidity"]) if values["humidity"] else 0
-                avg_rainfall = sum(values["rainfall"]) / len(values["rainfall"]) if values["rainfall"] else 0
-
-                monthly_averages[month_key] = {
-                    "avg_temp": avg_temp,
-                    "avg_humidity": avg_humidity,
-                    "avg_rainfall": avg_rainfall
-                }
-
-            # Calculate the average of the monthly averages
-            num_months = len(monthly_averages)
-            if num_months > 0:
-                avg_of_avg_temp = sum(month["avg_temp"] for month in monthly_averages.values()) / num_months
-                avg_of_avg_humidity = sum(month["avg_humidity"] for month in monthly_averages.values()) / num_months
-                avg_of_avg_rainfall = sum(month["avg_rainfall"] for month in monthly_averages.values()) / num_months
-
-                '''
-                st.write(f"Average of Monthly Averages (for the next 183 days):")
-                st.write(f"Temperature: {avg_of_avg_temp:.2f} °C")
-                st.write(f"Humidity: {avg_of_avg_humidity:.2f} %")
-                st.write(f"Rainfall: {avg_of_avg_rainfall:.2f} mm/6h")'''
-            else:
-                '''st.write("No data available for the given range.")'''
-    else:
-            '''st.write("No data available for the given coordinates.")'''
+    averages = seasonal_averages(latitude, longitude)
+    if averages is None:
+        raise ValueError("No seasonal data available for the given coordinates")
+    avg_of_avg_temp, avg_of_avg_humidity, avg_of_avg_rainfall = averages
 
     # Get soil data using default values instead of OCR
     print("Soil Data:", soil_data)
 
-    # Load and train crop recommendation model
-    recommender = CropRecommendationModel()
-    dataset_path = 'recommend_vision.csv'  # Path to your dataset
-    dataset = recommender.load_dataset_from_drive(dataset_path)
+    # Use the crop recommendation model loaded at startup
     if dataset is not None:
-        model_components = recommender.train_model(dataset)
-        save_path = 'crop_recommendation_model.pkl'  # Path to save the model
-        recommender.save_model(model_components, save_path)
-
         # Define input data
         input_data = {
             'N': soil_data['Nitrogen'],
@@ -245,7 +435,6 @@ def dothething(nitrogen, phosphorus, potassium,
         print("Input Data for Prediction:", input_data)
 
         # Make predictions
-        predictor = CropRecommendationPredictor(model_components)
         top_4_crops = predictor.get_crop_recommendations(input_data, dataset)
         print("\nTop 4 Crop Recommendations:")
         for crop, score in top_4_crops.items():
@@ -263,6 +452,12 @@ def dothething(nitrogen, phosphorus, potassium,
     return {"error": "Failed to load dataset"}
 
 
+# Load (or train once) the model at startup; every request reuses it and the dataset
+model_components, dataset = CropRecommendationModel().load_or_train(DATASET_PATH, MODEL_PATH)
+predictor = (CropRecommendationPredictor(model_components, CROP_SCORING, CROP_SCORING_NEIGHBORS, CROP_SCORING_RADIUS,
+                                         CROP_MODEL_WEIGHT, CROP_RF_JOBS)
+             if model_components is not None else None)
+
 
 app = Flask(__name__)
 CORS(app, resources={
@@ -380,5 +575,63 @@ def get_soil_data():
     except Exception as e:
         return {'error': str(e)}, 400
 
+def sample_value(sample, key, default=0):
+    value = sample.get(key)
+    # Missing JSON keys and empty CSV cells both fall back to the default
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return default
+    return float(value)
+
+@app.route('/soil-data/batch', methods=['POST'])
+def get_soil_data_batch():
+    """
+    Recommendations for many soil samples at once. Takes a JSON array of objects, or a
+    CSV upload in the `file` field, with the /soil-data parameters as keys/columns and
+    optional latitude/longitude. The seasonal forecast is fetched once per location.
+    """
+    if predictor is None:
+        return {'error': 'Failed to load dataset'}, 500
+
+    try:
+        if 'file' in request.files:
+            samples = pd.read_csv(request.files['file']).to_dict('records')
+        else:
+            samples = request.get_json(silent=True)
+        if not isinstance(samples, list):
+            return {'error': 'Expected a JSON array of samples or a CSV file'}, 400
+        if len(samples) > MAX_BATCH_SAMPLES:
+            return {'error': f'At most {MAX_BATCH_SAMPLES} samples per request'}, 400
+
+        locations = [(sample_value(sample, 'latitude', DEFAULT_LATITUDE),
+                      sample_value(sample, 'longitude', DEFAULT_LONGITUDE)) for sample in samples]
+        soil = [(sample_value(sample, 'nitrogen'), sample_value(sample, 'phosphorus'),
+                 sample_value(sample, 'potassium'), sample_value(sample, 'ph')) for sample in samples]
+    except (ValueError, TypeError, AttributeError, pd.errors.ParserError) as e:
+        return {'error': f'Invalid samples: {str(e)}'}, 400
+
+    try:
+        weather = {location: seasonal_averages(*location) for location in set(locations)}
+    except Exception as e:
+        return {'error': str(e)}, 400
+
+    results = [None] * len(samples)
+    scored, inputs = [], []
+    for i, (location, (nitrogen, phosphorus, potassium, ph)) in enumerate(zip(locations, soil)):
+        if weather[location] is None:
+            results[i] = {'error': 'No seasonal data available for the given coordinates'}
+            continue
+        temperature, humidity, rainfall = weather[location]
+        scored.append(i)
+        inputs.append([nitrogen, phosphorus, potassium, temperature, humidity, ph, rainfall])
+
+    if inputs:
+        for i, top_4_crops in zip(scored, predictor.get_crop_recommendations_batch(inputs, dataset)):
+            results[i] = {'recommendations': {crop: f"{score:.2f}%" for crop, score in top_4_crops.items()}}
+
+    return jsonify({
+        "status": "success",
+        "results": results,
+    })
+
 if __name__ == "__main__":
     app.run(debug=True, port=8000)
\ No newline at end of file
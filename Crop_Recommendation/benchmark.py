@@ -0,0 +1,81 @@
+"""
+Benchmarks the crop recommender's scoring modes against the exact affinity sum.
+
+recommend_vision.csv is grown to --rows rows by resampling it with a little noise, as
+a stand-in for a larger regional dataset, and --samples soil samples are scored in one
+batch. For each mode the table shows the index build time, the time per sample, the
+share of the exact top 4 crops it recovers and the mean difference in their percentages.
+
+    python benchmark.py --rows 1000000 --samples 200
+    python benchmark.py --neighbors 64 256 1024 --radii 0.1 0.2 0.3
+"""
+import argparse
+import time
+import numpy as np
+from app import (CropRecommendationPredictor, model_components, dataset as base_dataset,
+                 FEATURE_COLUMNS)
+
+
+def grown_dataset(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    sampled = base_dataset.iloc[rng.integers(0, len(base_dataset), rows)].reset_index(drop=True)
+    spread = base_dataset[FEATURE_COLUMNS].std().values
+    sampled[FEATURE_COLUMNS] = sampled[FEATURE_COLUMNS].values + rng.normal(0, 0.02, (rows, len(FEATURE_COLUMNS))) * spread
+    return sampled
+
+
+def soil_samples(samples, seed=1):
+    rng = np.random.default_rng(seed)
+    picked = base_dataset[FEATURE_COLUMNS].values[rng.integers(0, len(base_dataset), samples)]
+    return picked + rng.normal(0, 0.1, picked.shape) * base_dataset[FEATURE_COLUMNS].std().values
+
+
+def run(predictor, dataset, inputs):
+    start = time.perf_counter()
+    predictor.dataset_features(dataset)
+    if predictor.scoring != 'exact':
+        predictor.dataset_index(dataset)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recommendations = predictor.get_crop_recommendations_batch(inputs, dataset)
+    sample_seconds = (time.perf_counter() - start) / len(inputs)
+    return build_seconds, sample_seconds, recommendations
+
+
+def compare(exact, approximate):
+    """(share of the exact top 4 found, mean percentage difference on the crops found)."""
+    found, differences = 0, []
+    for expected, got in zip(exact, approximate):
+        common = expected.index.intersection(got.index)
+        found += len(common)
+        differences.extend(np.abs(expected[common] - got[common]))
+    return found / (4 * len(exact)), float(np.mean(differences)) if differences else float('nan')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the crop recommendation scoring modes")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--neighbors", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--radii", type=float, nargs="+", default=[0.1, 0.2, 0.3])
+    args = parser.parse_args()
+
+    dataset = grown_dataset(args.rows)
+    inputs = soil_samples(args.samples)
+    print(f"{len(dataset)} dataset rows, {len(inputs)} samples\n")
+
+    modes = [('exact', {})]
+    modes += [('knn', {'neighbors': k}) for k in args.neighbors]
+    modes += [('radius', {'radius': r}) for r in args.radii]
+
+    print(f"{'mode':<20}{'build s':>10}{'ms/sample':>12}{'top-4 found':>14}{'mean diff %':>14}")
+    exact = None
+    for scoring, options in modes:
+        predictor = CropRecommendationPredictor(model_components, scoring, **options)
+        build_seconds, sample_seconds, recommendations = run(predictor, dataset, inputs)
+        if exact is None:
+            exact = recommendations
+        found, difference = compare(exact, recommendations)
+        label = scoring + "".join(f" {value}" for value in options.values())
+        print(f"{label:<20}{build_seconds:>10.2f}{sample_seconds * 1000:>12.3f}{found:>14.1%}{difference:>14.3f}")
@@ -0,0 +1,94 @@
+"""
+Benchmarks the /get_weather forecasters: training time, forecast time and forecast error
+on held-out days.
+
+The last --horizon days of history are held out; each forecaster kind is trained in each
+mode on the rest and scored on them with the mean absolute error per weather variable.
+Forecast time is the latency of one --horizon day forecast, averaged over --repeats runs,
+for the models as trained (eager) and compiled to TorchScript as /get_weather loads them.
+It compares the day-by-day autoregressive loop with the single-pass direct head, and the
+Python loop with the compiled one. --threads pins torch to that many threads, as
+TORCH_NUM_THREADS does for each worker.
+
+    python benchmark_forecast.py --synthetic
+    python benchmark_forecast.py --lat 19.0760 --lon 72.8777 --epochs 50
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import torch
+from main import (fetch_weather_data, train_forecaster, forecast_lstm, script_forecaster,
+                  FORECASTER_KINDS, FORECAST_MODES)
+
+
+def synthetic_history(days=5 * 365, seed=0):
+    """Seasonal temperature, rainfall and humidity with noise, for runs without network access."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    season = np.sin(2 * np.pi * t / 365.25)
+    return pd.DataFrame({
+        "Temperature": 27 + 4 * season + rng.normal(0, 1.0, days),
+        "Rainfall": np.clip(6 * np.maximum(season, 0) + rng.gamma(0.6, 2.0, days) - 1, 0, None),
+        "Humidity": 70 + 15 * season + rng.normal(0, 4.0, days),
+    }, index=pd.date_range(end=pd.Timestamp.today().normalize(), periods=days))
+
+
+def load_history(lat, lon):
+    weather_df = fetch_weather_data(lat, lon)
+    weather_df.set_index("date", inplace=True)
+    weather_df.index = pd.to_datetime(weather_df.index)
+    return weather_df
+
+
+def run(kind, mode, train_df, test_df, epochs, repeats=5, seed=0):
+    torch.manual_seed(seed)
+    horizon = 1 if mode == "autoregressive" else len(test_df)
+
+    start = time.perf_counter()
+    forecaster = train_forecaster(train_df, epochs=epochs, kind=kind, horizon=horizon)
+    train_seconds = time.perf_counter() - start
+
+    forecast_seconds = {}
+    for backend, timed in (("eager", forecaster), ("torchscript", script_forecaster(forecaster))):
+        # One untimed run, so TorchScript's profiling runs are not counted
+        forecast_lstm(train_df, forecast_periods=len(test_df), forecaster=timed)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            forecast_df, _ = forecast_lstm(train_df, forecast_periods=len(test_df), forecaster=timed)
+        forecast_seconds[backend] = (time.perf_counter() - start) / repeats
+
+    errors = {column: float(np.nanmean(np.abs(forecast_df[column].values - test_df[column].values)))
+              for column in test_df.columns}
+    return train_seconds, forecast_seconds, errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the weather forecasters")
+    parser.add_argument("--lat", type=float, default=19.0760)
+    parser.add_argument("--lon", type=float, default=72.8777)
+    parser.add_argument("--synthetic", action="store_true", help="Use generated history instead of Open-Meteo")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--horizon", type=int, default=120)
+    parser.add_argument("--kinds", nargs="+", choices=FORECASTER_KINDS, default=list(FORECASTER_KINDS))
+    parser.add_argument("--modes", nargs="+", choices=FORECAST_MODES, default=list(FORECAST_MODES))
+    parser.add_argument("--repeats", type=int, default=5, help="Forecasts timed per forecaster")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    history = synthetic_history() if args.synthetic else load_history(args.lat, args.lon)
+    train_df, test_df = history.iloc[:-args.horizon], history.iloc[-args.horizon:]
+    print(f"{len(train_df)} training days, {len(test_df)} held-out days, {args.epochs} epochs, "
+          f"{torch.get_num_threads()} threads\n")
+
+    print(f"{'forecaster':<14}{'mode':<16}{'train s':>10}{'eager ms':>10}{'script ms':>11}"
+          + "".join(f"{'MAE ' + c:>18}" for c in test_df.columns))
+    for kind in args.kinds:
+        for mode in args.modes:
+            train_seconds, forecast_seconds, errors = run(kind, mode, train_df, test_df, args.epochs, args.repeats)
+            print(f"{kind:<14}{mode:<16}{train_seconds:>10.2f}"
+                  f"{forecast_seconds['eager'] * 1000:>10.1f}{forecast_seconds['torchscript'] * 1000:>11.1f}"
+                  + "".join(f"{errors[c]:>18.3f}" for c in test_df.columns))
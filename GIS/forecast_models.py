@@ -0,0 +1,69 @@
+from caching import LRUCache
+import threading
+import torch
+import os
+
+
+class ModelRegistry:
+    """
+    Pretrained weather forecasting models, one file per grid cell and model kind.
+
+    Files hold plain state_dicts and scaler ranges written by `train_models.py` (or by a
+    request that had to train a missing cell). Loaded models are kept in an LRU cache;
+    a file that is rewritten on disk is reloaded on its next use.
+    """
+
+    def __init__(self, folder, loader, grid_size=1.0, cache_size=16):
+        self.folder = folder
+        self.loader = loader
+        self.grid_size = grid_size
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def cell(self, lat, lon):
+        return (int(round(lat / self.grid_size)), int(round(lon / self.grid_size)))
+
+    def path_for(self, cell, kind):
+        return os.path.join(self.folder, kind, f"cell_{cell[0]}_{cell[1]}.pt")
+
+    def save(self, cell, bundle, kind):
+        path = self.path_for(cell, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name first so other workers never load a partial file; the
+        # name is per writer so processes saving the same cell never share one
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        torch.save(bundle, temp_path)
+        os.replace(temp_path, path)
+
+    def get(self, cell, kind):
+        """The loaded model for a cell, or None when none has been trained yet."""
+        path = self.path_for(cell, kind)
+        if not os.path.exists(path):
+            return None
+
+        mtime = os.path.getmtime(path)
+        cached = self._cache.get((cell, kind))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        # Loads of different cells don't wait on each other; concurrent loads of the same
+        # cell wait for the first one and reuse its model
+        with self._lock:
+            key_lock = self._key_locks.setdefault((cell, kind), threading.Lock())
+        with key_lock:
+            cached = self._cache.get((cell, kind))
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            try:
+                bundle = torch.load(path, map_location="cpu", weights_only=True)
+                model = self.loader(bundle)
+            except Exception as e:
+                # Unreadable or outdated files are treated as missing, so they get retrained
+                print(f"Error loading {path}: {str(e)}")
+                return None
+            self._cache.set((cell, kind), (mtime, model))
+        return model
+
+    def info(self):
+        return self._cache.info()
@@ -1,16 +1,75 @@
 from flask import Flask, request, jsonify
-import rasterio
 from rasterio.transform import rowcol
-from pyproj import Transformer, CRS
+from rasterio.features import geometry_mask
+from rasterio.windows import Window
+from rasterio import windows
 import numpy as np
-import glob
+import hashlib
 import os
 import re
 from flask_cors import CORS
+from rasters import registry, transformers, list_raster_files
+from caching import LRUCache
+from layers import layers
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+GIS_DATA_FOLDER = "gis_data"
+
+# Built by `python rasters.py convert`; rasters found here are memory-mapped
+GIS_CACHE_FOLDER = "gis_cache"
+
+# Set GIS_PRELOAD_CUBE=1 to hold rasters that share a grid in memory as one stacked array
+PRELOAD_CUBE = os.environ.get("GIS_PRELOAD_CUBE", "0") == "1"
+
+# Upper bound on the number of points accepted by /get_data_batch
+MAX_BATCH_POINTS = 10000
+
+# /get_data responses cached per raster cell; tune with GIS_RESPONSE_CACHE_SIZE and
+# GIS_RESPONSE_CACHE_TTL (seconds)
+response_cache = LRUCache(
+    maxsize=int(os.environ.get("GIS_RESPONSE_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("GIS_RESPONSE_CACHE_TTL", "3600"))
+)
+
+# Rows read per window when streaming zonal statistics
+ZONAL_CHUNK_ROWS = 256
+
+# Fraction layers that classes_data reduces to a soil type and a soil depth class
+SOIL_TYPE_KEYS = ("floamy", "fclayey", "fclayskeletal", "fsandy")
+SOIL_DEPTH_KEYS = (
+    "fsoildep0_25", "fsoildep25_50", "fsoildep50_75",
+    "fsoildep75_100", "fsoildep100_150", "fsoildep150_200"
+)
+
+# Returned when gis_data holds no rasters, for testing
+DUMMY_DATA = {
+    "organic_carbon_density": 26.02,
+    "inorganic_carbon_density": 62.77,
+    "net_sown_area": 52.42,
+    "kharif": 49.92,
+    "rabi": 50.08,
+    "soil_type": "loamy",
+    "soil_depth": "75-100cm"
+}
+
+def label_raster_value(entry, value):
+    """
+    Maps a raster to its output key through the layer table and applies the layer's
+    normalisation. Returns (key, None) when the layer skips nodata and value is nodata.
+    """
+    layer = layers[entry.file_name]
+
+    if layer.nodata == "skip" and entry.nodata is not None and value == entry.nodata:
+        return layer.key, None
+
+    if layer.normalize == "minmax":
+        stats = entry.stats
+        value = (value - stats["min"]) / (stats["max"] - stats["min"]) * 100
+
+    return layer.key, value
+
 def get_raster_values(lat, lon, raster_paths, default_crs="EPSG:32643"):
     """
     Fetches raster values at the given latitude and longitude for multiple .asc and .tif raster files.
@@ -27,82 +86,330 @@ def get_raster_values(lat, lon, raster_paths, default_crs="EPSG:32643"):
     """
     results = {}
 
+    if registry.cubes_enabled:
+        cube_groups, raster_paths = registry.group_by_cube(raster_paths)
+        for cube, layer_indices in cube_groups:
+            try:
+                dataset_crs = cube.crs if cube.crs else default_crs
+
+                transformer = transformers.get("EPSG:4326", dataset_crs)
+                x, y = transformer.transform(lon, lat)
+                row, col = rowcol(cube.transform, x, y)
+                if not (0 <= row < cube.height and 0 <= col < cube.width):
+                    raise ValueError(f"Pixel ({row}, {col}) is outside the raster extent")
+
+                values = cube.sample(layer_indices, row, col)[:, 0]
+                for layer, value in zip(layer_indices, values):
+                    entry = cube.entries[layer]
+                    file_name, value = label_raster_value(entry, value)
+                    if value is not None:
+                        results[file_name] = float(round(value, 2))
+            except Exception as e:
+                print(f"Error processing raster cube: {str(e)}")
+                continue
+
     for raster_path in raster_paths:
         try:
-            with rasterio.open(raster_path) as dataset:
-                dataset_crs = dataset.crs if dataset.crs else CRS.from_string(default_crs)
+            entry = registry.get(raster_path)
+            dataset_crs = entry.crs if entry.crs else default_crs
 
-                transformer = Transformer.from_crs("EPSG:4326", dataset_crs, always_xy=True)
-                x, y = transformer.transform(lon, lat)
-                row, col = rowcol(dataset.transform, x, y)
-
-                value = dataset.read(1)[row, col]
-
-                min_val = dataset.read(1).min()
-                max_val = dataset.read(1).max()
-                
-                # Extract filename without extension and store the value
-                file_name = os.path.splitext(os.path.basename(raster_path))[0]
-                
-                if file_name == 'meanticd':
-                    file_name = "inorganic_carbon_density"
-                elif file_name == 'meantocd':
-                    file_name = "organic_carbon_density"
-            
-                elif file_name =='fsalt':
-                    file_name = "salt_affected"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                elif file_name =='fwatero':
-                    file_name = "water_erosion"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                elif file_name =='fwindero':
-                    file_name = "wind_erosion"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                elif file_name =='fwaterlog':
-                    file_name = "water_logging"
-                    value = (value - min_val) / (max_val - min_val) * 100
-
-                elif file_name.startswith('ffallow'):
-                    file_name = "fallow"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                elif file_name.startswith('fkharif'):
-                    file_name = "kharif"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                elif file_name.startswith('frabi'):
-                    file_name = "rabi"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                elif file_name.startswith('fnsa'):
-                    file_name = "net_sown_area"
-                    value = (value - min_val) / (max_val - min_val) * 100
-                
-                elif file_name.startswith('rootsm'):
-                    file_name = "root_level_surface_moisture"
-                elif file_name.startswith('s_runoff'):
-                    file_name = "surface_runoff"
-                elif file_name.startswith('upSMNRSC'):
-                    file_name = "upper_level_surface_moisture"
-                elif file_name.startswith('ocm2_vf'):
-                    file_name = "vegetation_fraction"
-                elif file_name.startswith('ocm2_ndvi_filt'):
-                    file_name = "filtered_ndvi"
-                elif file_name.startswith('localocm2'):
-                    file_name = "local_ndvi"
-                elif file_name.startswith('globalocm2'):
-                    file_name = "global_ndvi"
-                elif file_name.startswith('evaNHP'):
-                    file_name = "evapotranspiration"
-
-                results[file_name] = float(round(value, 2))
+            transformer = transformers.get("EPSG:4326", dataset_crs)
+            x, y = transformer.transform(lon, lat)
+            row, col = rowcol(entry.transform, x, y)
+
+            value = entry.read_pixel(row, col)
+
+            file_name, value = label_raster_value(entry, value)
+            if value is None:
+                continue
+
+            results[file_name] = float(round(value, 2))
+        except Exception as e:
+            print(f"Error processing {raster_path}: {str(e)}")
+            continue
+
+    return results
+
+def get_raster_values_batch(lats, lons, raster_paths, default_crs="EPSG:32643"):
+    """
+    Batch version of get_raster_values. Coordinates are transformed in one vectorized
+    call per CRS, and each raster is read once for all points.
+
+    Parameters:
+    lats (array-like): Latitude coordinates
+    lons (array-like): Longitude coordinates
+    raster_paths (list): List of file paths to raster files (.asc, .tif)
+    default_crs (str): Default CRS if the raster file lacks CRS info (default: "EPSG:32643")
+
+    Returns:
+    list: One dictionary per point, shaped like the result of get_raster_values
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    results = [{} for _ in range(len(lats))]
+    projected = {}
+
+    def project(dataset_crs, transform, height, width):
+        crs_key = str(dataset_crs)
+        if crs_key not in projected:
+            transformer = transformers.get("EPSG:4326", dataset_crs)
+            projected[crs_key] = transformer.transform(lons, lats)
+        xs, ys = projected[crs_key]
+
+        rows, cols = rowcol(transform, xs, ys)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        return rows, cols, inside
+
+    if registry.cubes_enabled:
+        cube_groups, raster_paths = registry.group_by_cube(raster_paths)
+        for cube, layer_indices in cube_groups:
+            try:
+                dataset_crs = cube.crs if cube.crs else default_crs
+                rows, cols, inside = project(dataset_crs, cube.transform, cube.height, cube.width)
+                if not inside.any():
+                    continue
+
+                points = np.flatnonzero(inside)
+                values = cube.sample(layer_indices, rows[inside], cols[inside])
+                for layer, layer_values in zip(layer_indices, values):
+                    entry = cube.entries[layer]
+                    for i, value in zip(points, layer_values):
+                        file_name, value = label_raster_value(entry, value)
+                        if value is not None:
+                            results[i][file_name] = float(round(value, 2))
+            except Exception as e:
+                print(f"Error processing raster cube: {str(e)}")
+                continue
+
+    for raster_path in raster_paths:
+        try:
+            entry = registry.get(raster_path)
+            dataset_crs = entry.crs if entry.crs else default_crs
+            rows, cols, inside = project(dataset_crs, entry.transform, entry.height, entry.width)
+            if not inside.any():
+                continue
+
+            values = entry.read_pixels(rows[inside], cols[inside])
+            for i, value in zip(np.flatnonzero(inside), values):
+                file_name, value = label_raster_value(entry, value)
+                if value is not None:
+                    results[i][file_name] = float(round(value, 2))
         except Exception as e:
             print(f"Error processing {raster_path}: {str(e)}")
             continue
 
     return results
 
+def parse_points(payload):
+    """
+    Reads coordinates from a JSON array of {"lat", "lon"} objects or from a GeoJSON
+    MultiPoint (bare geometry or Feature). Returns (lats, lons).
+    """
+    if isinstance(payload, dict):
+        geometry = payload.get("geometry", payload) if payload.get("type") == "Feature" else payload
+        if geometry.get("type") != "MultiPoint":
+            raise ValueError("Expected a GeoJSON MultiPoint")
+        # GeoJSON positions are [lon, lat]
+        coordinates = geometry.get("coordinates", [])
+        lons = [float(position[0]) for position in coordinates]
+        lats = [float(position[1]) for position in coordinates]
+    elif isinstance(payload, list):
+        lats = [float(point["lat"]) for point in payload]
+        lons = [float(point["lon"]) for point in payload]
+    else:
+        raise ValueError("Expected a JSON array of points or a GeoJSON MultiPoint")
+    return lats, lons
+
+def parse_geometry(payload):
+    """
+    Reads an area from {"bbox": [min_lon, min_lat, max_lon, max_lat]} or from a GeoJSON
+    Polygon / MultiPolygon (bare geometry or Feature). Returns a GeoJSON geometry dict.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    if "bbox" in payload and payload.get("type") is None:
+        min_lon, min_lat, max_lon, max_lat = [float(v) for v in payload["bbox"]]
+        return {
+            "type": "Polygon",
+            "coordinates": [[[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat],
+                             [min_lon, max_lat], [min_lon, min_lat]]]
+        }
+    geometry = payload.get("geometry", payload) if payload.get("type") == "Feature" else payload
+    if geometry.get("type") not in ("Polygon", "MultiPolygon"):
+        raise ValueError("Expected a bbox or a GeoJSON Polygon/MultiPolygon")
+    return geometry
+
+def project_geometry(geometry, transformer):
+    """Reprojects a Polygon/MultiPolygon ring by ring, each in one vectorized call."""
+    def project_ring(ring):
+        ring = np.asarray(ring, dtype=np.float64)
+        xs, ys = transformer.transform(ring[:, 0], ring[:, 1])
+        return np.column_stack([xs, ys]).tolist()
+
+    if geometry["type"] == "Polygon":
+        coordinates = [project_ring(ring) for ring in geometry["coordinates"]]
+    else:
+        coordinates = [[project_ring(ring) for ring in polygon] for polygon in geometry["coordinates"]]
+    return {"type": geometry["type"], "coordinates": coordinates}
+
+def geometry_window(geometry, entry):
+    """Smallest in-bounds pixel Window covering a projected geometry, or None if disjoint."""
+    polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+    points = np.array([point for polygon in polygons for ring in polygon for point in ring])
+    xs = [points[:, 0].min(), points[:, 0].max()]
+    ys = [points[:, 1].min(), points[:, 1].max()]
+    rows, cols = rowcol(entry.transform, [xs[0], xs[0], xs[1], xs[1]], [ys[0], ys[1], ys[0], ys[1]])
+
+    row_start = max(int(min(rows)), 0)
+    row_stop = min(int(max(rows)) + 1, entry.height)
+    col_start = max(int(min(cols)), 0)
+    col_stop = min(int(max(cols)) + 1, entry.width)
+    if row_start >= row_stop or col_start >= col_stop:
+        return None
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+def get_zonal_stats(geometry, raster_paths, default_crs="EPSG:32643"):
+    """
+    Computes mean, min, max and valid pixel count of every raster over a lon/lat area.
+
+    Rasters are grouped by grid and read in windows of ZONAL_CHUNK_ROWS rows covering
+    the area, so large polygons never load whole bands. Within a grid, the soil type and
+    soil depth layers are also reduced per pixel to the dominant class, giving a pixel
+    histogram for each.
+
+    Parameters:
+    geometry (dict): GeoJSON Polygon or MultiPolygon in EPSG:4326
+    raster_paths (list): List of file paths to raster files (.asc, .tif)
+    default_crs (str): Default CRS if the raster file lacks CRS info (default: "EPSG:32643")
+
+    Pixels count when their centre is inside the area; an area that contains no pixel
+    centre (e.g. a field smaller than one cell) uses every pixel it touches instead.
+
+    Returns:
+    tuple: (per-layer statistics keyed like get_raster_values, soil type pixel counts,
+    soil depth pixel counts), all empty when no pixel covers the area
+    """
+    groups = {}
+    for raster_path in raster_paths:
+        try:
+            entry = registry.get(raster_path)
+            groups.setdefault(entry.grid_key, []).append(entry)
+        except Exception as e:
+            print(f"Error processing {raster_path}: {str(e)}")
+
+    layer_stats = {}
+    soil_type_pixels = {}
+    soil_depth_pixels = {}
+
+    for entries in groups.values():
+        try:
+            grid = entries[0]
+            dataset_crs = grid.crs if grid.crs else default_crs
+            projected = project_geometry(geometry, transformers.get("EPSG:4326", dataset_crs))
+            window = geometry_window(projected, grid)
+            if window is None:
+                continue
+
+            names = [entry.file_name for entry in entries]
+            class_groups = [
+                ([names.index(key) for key in SOIL_TYPE_KEYS if key in names], soil_type_pixels),
+                ([names.index(key) for key in SOIL_DEPTH_KEYS if key in names], soil_depth_pixels),
+            ]
+            totals = [{"count": 0, "sum": 0.0, "min": None, "max": None} for _ in entries]
+
+            # Areas too small to contain any pixel centre fall back to the pixels they touch
+            for all_touched in (False, True):
+                covered = False
+                for row in range(window.row_off, window.row_off + window.height, ZONAL_CHUNK_ROWS):
+                    chunk = Window(window.col_off, row, window.width,
+                                   min(ZONAL_CHUNK_ROWS, window.row_off + window.height - row))
+                    inside = geometry_mask([projected], out_shape=(chunk.height, chunk.width),
+                                           transform=windows.transform(chunk, grid.transform), invert=True,
+                                           all_touched=all_touched)
+                    if not inside.any():
+                        continue
+                    covered = True
+
+                    blocks = []
+                    for entry, total in zip(entries, totals):
+                        block = entry.read_window(chunk)
+                        valid = inside & ~np.isnan(block)
+                        if entry.nodata is not None:
+                            valid &= block != entry.nodata
+                        blocks.append(np.where(valid, block, -np.inf))
+
+                        values = block[valid]
+                        if values.size == 0:
+                            continue
+                        total["count"] += int(values.size)
+                        total["sum"] += float(values.sum(dtype=np.float64))
+                        total["min"] = values.min() if total["min"] is None else min(total["min"], values.min())
+                        total["max"] = values.max() if total["max"] is None else max(total["max"], values.max())
+
+                    # Dominant class per pixel, counted over pixels where any class layer is valid
+                    for layer_indices, pixels in class_groups:
+                        if not layer_indices:
+                            continue
+                        stacked = np.stack([blocks[layer] for layer in layer_indices])
+                        has_value = np.isfinite(stacked).any(axis=0)
+                        counts = np.bincount(stacked.argmax(axis=0)[has_value], minlength=len(layer_indices))
+                        for layer, count in zip(layer_indices, counts):
+                            pixels[names[layer]] = pixels.get(names[layer], 0) + int(count)
+                if covered:
+                    break
+
+            for entry, total in zip(entries, totals):
+                if total["count"] == 0:
+                    continue
+                summary = {}
+                for stat, value in (("mean", total["sum"] / total["count"]),
+                                    ("min", total["min"]), ("max", total["max"])):
+                    key, value = label_raster_value(entry, value)
+                    summary[stat] = float(round(value, 2))
+                summary["count"] = total["count"]
+                layer_stats[key] = summary
+        except Exception as e:
+            print(f"Error processing zonal statistics: {str(e)}")
+            continue
+
+    return layer_stats, soil_type_pixels, soil_depth_pixels
+
+def response_cache_key(lat, lon, raster_paths, default_crs="EPSG:32643"):
+    """
+    Returns (dataset_version, cells) for the /get_data response cache.
+
+    Nearby coordinates that fall in the same raster cell get the same response, so the
+    key is the snapped (row, col) on each distinct grid rather than the raw lat/lon. When
+    every raster shares one grid this is just the reference grid's cell. The version
+    hash changes whenever a raster is added, removed or modified.
+    """
+    version = hashlib.sha1()
+    cells = {}
+    for raster_path in sorted(raster_paths):
+        try:
+            entry = registry.get(raster_path)
+        except Exception as e:
+            # get_raster_values skips unreadable rasters too; their responses are still cached
+            print(f"Error processing {raster_path}: {str(e)}")
+            version.update(f"{raster_path}:error\n".encode())
+            continue
+        version.update(f"{raster_path}:{entry.file_hash}\n".encode())
+
+        dataset_crs = entry.crs if entry.crs else default_crs
+        grid = (str(dataset_crs), tuple(entry.transform))
+        if grid not in cells:
+            x, y = transformers.get("EPSG:4326", dataset_crs).transform(lon, lat)
+            row, col = rowcol(entry.transform, x, y)
+            cells[grid] = (int(row), int(col))
+
+    return version.hexdigest(), tuple(cells[grid] for grid in sorted(cells))
+
 def classes_data(raster_values):
     new_dict = {}
 
-    soil_keys = ("floamy", "fclayey", "fclayskeletal", "fsandy")
+    soil_keys = SOIL_TYPE_KEYS
     soil_values = {key: raster_values.get(key, 0) for key in soil_keys}
     if soil_values:
         max_soil_type = max(soil_values, key=soil_values.get)
@@ -110,10 +417,7 @@ def classes_data(raster_values):
     else:
         new_dict['soil_type'] = "unknown"
     
-    soil_depth_keys = (
-        "fsoildep0_25", "fsoildep25_50", "fsoildep50_75",
-        "fsoildep75_100", "fsoildep100_150", "fsoildep150_200"
-    )
+    soil_depth_keys = SOIL_DEPTH_KEYS
     soil_depth_values = {key: raster_values.get(key, 0) for key in soil_depth_keys}
     if soil_depth_values:
         max_soil_depth = max(soil_depth_values, key=soil_depth_values.get)
@@ -157,29 +461,106 @@ def get_data():
     if lat is None or lon is None:
         return jsonify({"error": "Missing lat or lon parameters"}), 400
     
-    folder_path = "gis_data"
-    raster_files = glob.glob(os.path.join(folder_path, "*.asc")) + glob.glob(os.path.join(folder_path, "*.tif"))
+    raster_files = list_raster_files(GIS_DATA_FOLDER)
     
     try:
         # If no raster files found, return dummy data for testing
         if not raster_files:
-            dummy_data = {
-                "organic_carbon_density": 26.02,
-                "inorganic_carbon_density": 62.77,
-                "net_sown_area": 52.42,
-                "kharif": 49.92,
-                "rabi": 50.08,
-                "soil_type": "loamy",
-                "soil_depth": "75-100cm"
-            }
-            return jsonify(dummy_data)
+            return jsonify(DUMMY_DATA)
             
+        version, cells = response_cache_key(lat, lon, raster_files, "EPSG:32643")
+        # Responses computed from an older version of gis_data are dropped
+        response_cache.validate(version)
+        raster_values = response_cache.get(cells)
+        if raster_values is not None:
+            return jsonify(raster_values)
+
         raster_values = get_raster_values(lat, lon, raster_files, "EPSG:32643")
         raster_values = classes_data(raster_values)
+        # Dropped if gis_data changed while this response was being computed
+        response_cache.set(cells, raster_values, version)
         return jsonify(raster_values)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/get_data_batch', methods=['POST'])
+def get_data_batch():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"error": "Expected a JSON body"}), 400
+
+    try:
+        lats, lons = parse_points(payload)
+    except (ValueError, KeyError, TypeError, IndexError, AttributeError) as e:
+        return jsonify({"error": f"Invalid points: {str(e)}"}), 400
+
+    if len(lats) > MAX_BATCH_POINTS:
+        return jsonify({"error": f"At most {MAX_BATCH_POINTS} points per request"}), 400
+
+    raster_files = list_raster_files(GIS_DATA_FOLDER)
+
+    try:
+        if not raster_files:
+            return jsonify([dict(DUMMY_DATA) for _ in lats])
+
+        batch_values = get_raster_values_batch(lats, lons, raster_files, "EPSG:32643")
+        return jsonify([classes_data(raster_values) for raster_values in batch_values])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/get_zonal_stats', methods=['POST'])
+def get_zonal_stats_route():
+    payload = request.get_json(silent=True)
+    try:
+        geometry = parse_geometry(payload)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return jsonify({"error": f"Invalid area: {str(e)}"}), 400
+
+    raster_files = list_raster_files(GIS_DATA_FOLDER)
+
+    try:
+        if not raster_files:
+            return jsonify({"summary": DUMMY_DATA, "layers": {},
+                            "soil_type_pixels": {}, "soil_depth_pixels": {}})
+
+        layer_stats, soil_type_pixels, soil_depth_pixels = get_zonal_stats(geometry, raster_files, "EPSG:32643")
+        if not layer_stats and not soil_type_pixels and not soil_depth_pixels:
+            # Outside every raster (or only nodata): don't report the default summary
+            return jsonify({"summary": None, "layers": {}, "soil_type_pixels": {}, "soil_depth_pixels": {},
+                            "message": "No raster pixels cover this area"})
+
+        # classes_data picks the dominant soil classes from pixel counts and keeps the
+        # area means of every other layer
+        raster_values = {key: stats["mean"] for key, stats in layer_stats.items()}
+        raster_values.update(soil_type_pixels)
+        raster_values.update(soil_depth_pixels)
+
+        return jsonify({
+            "summary": classes_data(raster_values),
+            "layers": layer_stats,
+            "soil_type_pixels": {key[1:]: count for key, count in soil_type_pixels.items()},
+            "soil_depth_pixels": {key[len("fsoildep"):].replace("_", "-") + "cm": count
+                                  for key, count in soil_depth_pixels.items()},
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/layers', methods=['GET'])
+def list_layers():
+    """Output key, normalisation, unit and nodata policy of every raster in gis_data."""
+    return jsonify({file_name: layer.to_dict() for file_name, layer in layers.resolved().items()})
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify({"transformers": transformers.info(), "responses": response_cache.info()})
+
+# Open every raster once at startup; requests reuse these handles
+registry.cache_folder = GIS_CACHE_FOLDER
+registry.load_folder(GIS_DATA_FOLDER)
+layers.compile(os.path.splitext(os.path.basename(path))[0] for path in list_raster_files(GIS_DATA_FOLDER))
+if PRELOAD_CUBE:
+    registry.preload_cubes(GIS_DATA_FOLDER)
+
 if __name__ == '__main__':
     app.run(debug=True, port=7000)
 
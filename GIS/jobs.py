@@ -0,0 +1,186 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import sqlite3
+import json
+import uuid
+import time
+import os
+
+
+def connect(path):
+    # A connection per call keeps the store safe to use from request threads and workers
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return sqlite3.connect(path, timeout=30)
+
+
+def run_job(path, job_id, func, *args):
+    """Runs in a pool worker: records the job as running, then its result or error."""
+    with connect(path) as conn:
+        conn.execute("UPDATE jobs SET status = 'running' WHERE job_id = ? AND status = 'queued'", (job_id,))
+    try:
+        result, status, error = json.dumps(func(*args)), "done", None
+    except Exception as e:
+        result, status, error = None, "failed", str(e)
+    with connect(path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+            (status, result, error, time.time(), job_id)
+        )
+
+
+class JobQueue:
+    """
+    Runs `func` in a pool of worker processes and keeps the results for polling.
+
+    Job state lives in the SQLite file at `path`, so with several Flask processes on one
+    host any of them can report a job, and a job submitted through one is merged with an
+    identical one already in flight in another. Results must be JSON serialisable.
+
+    Jobs are identified by a key built from their arguments: submitting a key that is
+    already queued or running returns the existing job instead of starting another.
+    Finished jobs are kept for `result_ttl` seconds (at most `history` of them). A job
+    still unfinished after `job_timeout` seconds (its process was restarted, say) is
+    reported as failed and no longer merged into.
+
+    The pool is started on the first submit, so importing a module that creates a
+    JobQueue (as the spawned workers do) never starts processes. Each process that
+    submits jobs has its own pool of `max_workers` processes.
+    """
+
+    def __init__(self, func, path, max_workers=2, history=1024, result_ttl=3600, job_timeout=3600,
+                 start_method="spawn"):
+        self.func = func
+        self.path = path
+        self.max_workers = max_workers
+        self.history = history
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+        with connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " merged INTEGER NOT NULL DEFAULT 0,"
+                " submitted_at REAL NOT NULL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+
+    def submit(self, key, *args):
+        """Returns (job_id, merged): merged is True when an identical job was already in flight."""
+        key = json.dumps(key)
+        now = time.time()
+        conn = connect(self.path)
+        try:
+            # IMMEDIATE takes the write lock up front, so two processes submitting the same
+            # key can't both miss the other's job
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE key = ? AND status IN ('queued', 'running')"
+                " AND submitted_at > ? ORDER BY submitted_at DESC LIMIT 1",
+                (key, now - self.job_timeout)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET merged = merged + 1 WHERE job_id = ?", (row[0],))
+                conn.commit()
+                return row[0], True
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (job_id, key, status, submitted_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, key, now)
+            )
+            self._expire(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            try:
+                future = self._pool().submit(run_job, self.path, job_id, self.func, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool for new jobs
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                future = self._pool().submit(run_job, self.path, job_id, self.func, *args)
+
+        future.add_done_callback(lambda done: self._finished(job_id, done))
+        return job_id, False
+
+    def _finished(self, job_id, future):
+        # run_job records its own outcome; this only catches jobs whose worker died
+        if future.exception() is None:
+            return
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?"
+                " WHERE job_id = ? AND status IN ('queued', 'running')",
+                (str(future.exception()), time.time(), job_id)
+            )
+
+    def _expire(self, conn, now):
+        conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                     (now - self.result_ttl,))
+        conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND job_id NOT IN"
+            " (SELECT job_id FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?)",
+            (self.history,)
+        )
+        conn.execute("DELETE FROM jobs WHERE finished_at IS NULL AND submitted_at < ?",
+                     (now - self.job_timeout - self.result_ttl,))
+
+    def status(self, job_id):
+        """{"job_id", "status", and "result" or "error" once finished}, or None for unknown jobs."""
+        now = time.time()
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT status, result, error, submitted_at, finished_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, result, error, submitted_at, finished_at = row
+        if finished_at is not None and finished_at < now - self.result_ttl:
+            return None
+
+        output = {"job_id": job_id, "status": status}
+        if status in ("queued", "running") and submitted_at <= now - self.job_timeout:
+            output["status"] = "failed"
+            output["error"] = f"Job did not finish within {self.job_timeout} seconds"
+        elif status == "failed":
+            output["error"] = error
+        elif status == "done":
+            output["result"] = json.loads(result)
+        return output
+
+    def info(self):
+        with connect(self.path) as conn:
+            in_flight, finished, merged = conn.execute(
+                "SELECT SUM(finished_at IS NULL), SUM(finished_at IS NOT NULL), SUM(merged) FROM jobs"
+            ).fetchone()
+        return {"in_flight": in_flight or 0, "finished": finished or 0, "merged": merged or 0}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
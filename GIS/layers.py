@@ -0,0 +1,95 @@
+import threading
+import json
+import os
+
+# Override with GIS_LAYERS_CONFIG to load a different layer table
+DEFAULT_LAYERS_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layers.json")
+
+NORMALIZE_MODES = (None, "minmax")
+NODATA_POLICIES = ("keep", "skip")
+
+
+class Layer:
+    """
+    How one raster layer is reported: its output key, normalisation, unit and what to do
+    with nodata cells.
+
+    normalize: None to report the raw value, "minmax" to scale it to 0-100 with the
+    band statistics.
+    nodata: "keep" to report nodata cells like any other value, "skip" to leave the
+    layer out of the result at that point.
+    """
+
+    def __init__(self, key, normalize=None, unit=None, nodata="keep"):
+        if normalize not in NORMALIZE_MODES:
+            raise ValueError(f"Unknown normalize mode {normalize!r} for layer {key}")
+        if nodata not in NODATA_POLICIES:
+            raise ValueError(f"Unknown nodata policy {nodata!r} for layer {key}")
+        self.key = key
+        self.normalize = normalize
+        self.unit = unit
+        self.nodata = nodata
+
+    def to_dict(self):
+        return {"key": self.key, "normalize": self.normalize, "unit": self.unit, "nodata": self.nodata}
+
+
+class LayerTable:
+    """
+    Maps raster file names to Layers.
+
+    Rules from the config are matched in order against the file name: "name" matches
+    exactly, "prefix" matches the start. Files matching no rule are reported raw under
+    their own name. Each file name is matched once and the result is kept in a plain
+    dict, so lookups on the request path do no string matching.
+    """
+
+    def __init__(self, rules):
+        self._rules = rules
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_path):
+        with open(config_path) as f:
+            config = json.load(f)
+
+        rules = []
+        for rule in config["layers"]:
+            layer = Layer(rule["key"], rule.get("normalize"), rule.get("unit"), rule.get("nodata", "keep"))
+            if "name" in rule:
+                rules.append(("name", rule["name"], layer))
+            elif "prefix" in rule:
+                rules.append(("prefix", rule["prefix"], layer))
+            else:
+                raise ValueError(f"Layer {rule['key']} needs a 'name' or 'prefix' pattern")
+        return cls(rules)
+
+    def compile(self, file_names):
+        """Resolves file_names up front, typically every raster present at startup."""
+        for file_name in file_names:
+            self[file_name]
+
+    def __getitem__(self, file_name):
+        layer = self._resolved.get(file_name)
+        if layer is None:
+            with self._lock:
+                layer = self._resolved.get(file_name)
+                if layer is None:
+                    layer = self._match(file_name)
+                    self._resolved[file_name] = layer
+        return layer
+
+    def _match(self, file_name):
+        for kind, pattern, layer in self._rules:
+            if kind == "name" and file_name == pattern:
+                return layer
+            if kind == "prefix" and file_name.startswith(pattern):
+                return layer
+        return Layer(file_name)
+
+    def resolved(self):
+        return dict(self._resolved)
+
+
+layers = LayerTable.from_config(os.environ.get("GIS_LAYERS_CONFIG", DEFAULT_LAYERS_CONFIG))
@@ -7,11 +7,18 @@ from pyproj import Transformer, CRS
 import plotly.subplots as sp
 import plotly.graph_objects as go
 from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
+from weather_store import WeatherStore, split_range
+from forecast_models import ModelRegistry
+from jobs import JobQueue
 import pandas as pd
 import numpy as np
 import rasterio
 import requests
+import requests.adapters
+import threading
 import datetime
+import hashlib
 import time
 import glob
 import os
@@ -21,67 +28,168 @@ app = Flask(__name__)
 CORS(app)
 
 
-def fetch_weather_data(lat, lon, years=5, delay=0):
+# Set OPEN_METEO_ARCHIVE_URL to point at a mirror or a local stub server
+ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,precipitation_sum,relative_humidity_2m_mean"
+
+
+class TokenBucket:
+    """
+    Rate limiter shared by every upstream request: allows `rate` requests per second on
+    average, with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# One pooled session and one rate limit for every Open-Meteo call in this process
+session = requests.Session()
+session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+archive_rate_limiter = TokenBucket(
+    rate=float(os.environ.get("OPEN_METEO_RATE", "5")),
+    capacity=float(os.environ.get("OPEN_METEO_BURST", "5"))
+)
+
+
+def daily_column(values, length):
+    """One daily variable as a float array, NaN for nulls, padded with NaN to length."""
+    column = np.full(length, np.nan)
+    if values is not None:
+        values = np.array(values[:length], dtype=np.float64)
+        column[:len(values)] = values
+    return column
+
+
+def fetch_archive_window(lat, lon, start_date, end_date, label):
+    """Fetches one date range of daily history as a date/Temperature/Rainfall/Humidity frame."""
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily": DAILY_VARIABLES,
+        "timezone": "auto",
+    }
+
+    archive_rate_limiter.acquire()
+    response = session.get(ARCHIVE_URL, params=params, timeout=60)
+
+    if response.status_code == 200:
+        data = response.json()
+
+        if ("daily" in data and 
+            "time" in data["daily"] and 
+            "temperature_2m_max" in data["daily"] and 
+            "temperature_2m_min" in data["daily"] and 
+            "precipitation_sum" in data["daily"]):
+
+            daily = data["daily"]
+            dates = pd.to_datetime(daily["time"])
+            length = len(dates)
+
+            if "relative_humidity_2m_mean" not in daily:
+                print("Humidity data not available")
+
+            # Columnar parse: nulls become NaN, so a missing max or min gives a NaN mean
+            temp_max = daily_column(daily["temperature_2m_max"], length)
+            temp_min = daily_column(daily["temperature_2m_min"], length)
+            return pd.DataFrame({
+                "date": dates,
+                "Temperature": (temp_max + temp_min) / 2,
+                "Rainfall": daily_column(daily["precipitation_sum"], length),
+                "Humidity": daily_column(daily.get("relative_humidity_2m_mean"), length),
+            })
+        else:
+            print(f"Missing required data fields for {label}")
+            print(f"Available fields: {data.get('daily', {}).keys()}")
+    else:
+        print(f"Error fetching data for {label}: {response.status_code}")
+        print(f"Error message: {response.text}") 
+
+    return None
+
+
+def fetch_windows(lat, lon, windows, max_workers=5):
+    """Fetches (start_date, end_date, label) windows concurrently into one frame, in window order."""
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows)))) as executor:
+        # map keeps the windows in chronological order
+        frames = [frame for frame in executor.map(lambda window: fetch_archive_window(lat, lon, *window), windows)
+                  if frame is not None]
+
+    if not frames:
+        return pd.DataFrame(columns=["date", "Temperature", "Rainfall", "Humidity"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# Daily history already downloaded, shared by every request; see weather_store.py
+weather_store = WeatherStore(
+    os.environ.get("WEATHER_STORE_PATH", "weather_store.sqlite3"),
+    grid_size=float(os.environ.get("WEATHER_STORE_GRID", "0.1"))
+)
+
+
+def fetch_weather_data(lat, lon, years=5, single_request=False, max_workers=5, store=weather_store):
+    """
+    Fetches `years` years of daily temperature, rainfall and humidity history.
+
+    History is kept in `store`, keyed by the grid cell around (lat, lon), and only the
+    date ranges the store is missing are downloaded, so repeat locations cost at most a
+    few days of new data. Pass store=None to always download the full range.
+
+    Downloads are split into one-year windows fetched concurrently; the shared token
+    bucket keeps the request rate within limits. With single_request=True each missing
+    range is fetched in one call instead.
+    """
     today = datetime.date.today() - datetime.timedelta(days=5)  # Adjust start date to 5 days prior
     start_year = today.year - years 
     end_year = today.year  
-    
-    all_data = []
-    for year in range(start_year, end_year):
-        start_date = f"{year}-{today.month:02d}-{today.day:02d}"
-        end_date = f"{year + 1}-{today.month:02d}-{today.day:02d}" 
-
-        url = (f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}"
-               f"&start_date={start_date}&end_date={end_date}"
-               f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,relative_humidity_2m_mean"
-               f"&timezone=auto")
-        
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            data = response.json()
-
-            if ("daily" in data and 
-                "time" in data["daily"] and 
-                "temperature_2m_max" in data["daily"] and 
-                "temperature_2m_min" in data["daily"] and 
-                "precipitation_sum" in data["daily"]):
-                
-                dates = data["daily"]["time"]
-                temp_max = data["daily"]["temperature_2m_max"]
-                temp_min = data["daily"]["temperature_2m_min"]
-                rainfall = data["daily"]["precipitation_sum"]
-
-                if "relative_humidity_2m_mean" in data["daily"]:
-                    humidity = data["daily"]["relative_humidity_2m_mean"]
-                else:
-                    humidity = [None] * len(dates)
-                    print("Humidity data not available")
-                
-                for i in range(len(dates)):
-                    if temp_max[i] is not None and temp_min[i] is not None:
-                        avg_temp = (temp_max[i] + temp_min[i]) / 2
-                    else:
-                        avg_temp = None
-
-                    rain_val = rainfall[i] if rainfall[i] is not None else None
-                    hum_val = humidity[i] if i < len(humidity) else None
-                    
-                    all_data.append([dates[i], avg_temp, rain_val, hum_val])
-            else:
-                print(f"Missing required data fields for {year}")
-                print(f"Available fields: {data.get('daily', {}).keys()}")
+
+    if store is None:
+        if single_request:
+            windows = [(f"{start_year}-{today.month:02d}-{today.day:02d}",
+                        f"{end_year}-{today.month:02d}-{today.day:02d}",
+                        f"{start_year}-{end_year}")]
         else:
-            print(f"Error fetching data for {year}: {response.status_code}")
-            print(f"Error message: {response.text}") 
-        
-        # Add delay between requests to avoid rate limiting
-        if delay > 0 and year < end_year - 1:  # Don't delay after the last request
-            time.sleep(delay)
+            windows = [(f"{year}-{today.month:02d}-{today.day:02d}",
+                        f"{year + 1}-{today.month:02d}-{today.day:02d}",
+                        year)
+                       for year in range(start_year, end_year)]
+        df = fetch_windows(lat, lon, windows, max_workers)
+    else:
+        # Feb 29 has no counterpart in most earlier years
+        start_date = today.replace(year=start_year, day=min(today.day, 28) if today.month == 2 else today.day)
+        cell = store.cell(lat, lon)
+        cell_lat, cell_lon = store.cell_center(cell)
+
+        windows = []
+        for gap_start, gap_end in store.missing_ranges(cell, start_date, today):
+            chunks = [(gap_start, gap_end)] if single_request else split_range(gap_start, gap_end)
+            windows += [(chunk_start.isoformat(), chunk_end.isoformat(), f"{chunk_start} to {chunk_end}")
+                        for chunk_start, chunk_end in chunks]
+
+        if windows:
+            store.append(cell, fetch_windows(cell_lat, cell_lon, windows, max_workers))
+        df = store.read(cell, start_date, today)
     
-    if all_data:
-        df = pd.DataFrame(all_data, columns=["date", "Temperature", "Rainfall", "Humidity"])
-        df["date"] = pd.to_datetime(df["date"])
+    if not df.empty:
         return df
     else:
         print("No data collected")
@@ -89,13 +197,22 @@ def fetch_weather_data(lat, lon, years=5, delay=0):
 
 
 class LSTMModel(nn.Module):
-    def __init__(self, seq_length):
+    """
+    Two stacked LSTMs and a linear head predicting the next `horizon` days from
+    seq_length days.
+
+    n_features inputs and n_outputs outputs per day: 1 and 1 for the per-column models,
+    one per weather variable for the multivariate model. The head emits
+    horizon * n_outputs values, day by day.
+    """
+
+    def __init__(self, seq_length, n_features=1, n_outputs=1, horizon=1):
         super(LSTMModel, self).__init__()
-        self.lstm1 = nn.LSTM(1, 50, batch_first=True)
+        self.lstm1 = nn.LSTM(n_features, 50, batch_first=True)
         self.dropout1 = nn.Dropout(0.2)
         self.lstm2 = nn.LSTM(50, 50, batch_first=True)
         self.dropout2 = nn.Dropout(0.2)
-        self.fc = nn.Linear(50, 1)
+        self.fc = nn.Linear(50, n_outputs * horizon)
         
     def forward(self, x):
         # First LSTM layer
@@ -108,15 +225,254 @@ class LSTMModel(nn.Module):
         x = self.fc(x)
         return x
 
+    @torch.jit.export
+    def rollout(self, x: torch.Tensor, steps: int) -> torch.Tensor:
+        """
+        Forecasts `steps` days after the (1, seq_length, features) window x, feeding each
+        predicted day (or block of `horizon` days) back in. Returns (steps, features).
+        """
+        seq_length = x.shape[1]
+        n_features = x.shape[2]
+        blocks = []
+        produced = 0
+        while produced < steps:
+            block = self.forward(x).reshape(1, -1, n_features)
+            blocks.append(block[0])
+            produced += block.shape[1]
+            x = torch.cat([x, block], dim=1)[:, -seq_length:]
+        return torch.cat(blocks)[:steps]
+
+
+# "per_column" trains one univariate model per weather variable; "multivariate" trains a
+# single model on all of them at once
+FORECASTER_KINDS = ("per_column", "multivariate")
+
+# "autoregressive" predicts one day per forward pass and feeds it back; "direct" trains
+# a head that emits DIRECT_HORIZON days in a single pass
+FORECAST_MODES = ("autoregressive", "direct")
+DIRECT_HORIZON = int(os.environ.get("DIRECT_HORIZON", "120"))
+
+# "torchscript" compiles pretrained models as they are loaded; "eager" runs them as is
+INFERENCE_BACKENDS = ("torchscript", "eager")
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torchscript")
+if INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+    raise ValueError(f"INFERENCE_BACKEND must be one of {', '.join(INFERENCE_BACKENDS)}")
+
+
+def configure_torch_threads():
+    """
+    Applies TORCH_NUM_THREADS / TORCH_INTEROP_THREADS to this process. Every worker
+    (Flask or job pool) imports this module, so the limits hold per worker; keep
+    workers x threads at or below the cores of the machine.
+    """
+    if os.environ.get("TORCH_NUM_THREADS"):
+        torch.set_num_threads(int(os.environ["TORCH_NUM_THREADS"]))
+    if os.environ.get("TORCH_INTEROP_THREADS"):
+        try:
+            torch.set_num_interop_threads(int(os.environ["TORCH_INTEROP_THREADS"]))
+        except RuntimeError as e:
+            # Only possible before the first parallel work in the process
+            print(f"Error setting interop threads: {str(e)}")
 
-def forecast_lstm(df, forecast_periods=180, seq_length=10, epochs=50, batch_size=32):
-    # Set device
+
+configure_torch_threads()
+
+
+def get_device():
     if torch.cuda.is_available():
-        device = torch.device("cuda")
+        return torch.device("cuda")
     elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-        device = torch.device("mps")
+        return torch.device("mps")
+    else:
+        return torch.device("cpu")
+
+
+def range_scaler(data_min, data_max):
+    """A (0, 1) MinMaxScaler for the given per-column ranges, identical to one fitted on data spanning them."""
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaler.fit(np.array([data_min, data_max], dtype=np.float64))
+    return scaler
+
+
+def window_batches(series, seq_length, horizon, batch_size, shuffle=True):
+    """
+    Yields (inputs, targets) batches of the sliding windows over series (days x features).
+
+    The windows are a strided view of series (Tensor.unfold), so only the rows of the
+    current batch are ever copied. Targets are the `horizon` rows after each input run,
+    flattened day by day, or a flat vector for univariate next-day models.
+    """
+    # (windows, features, seq_length + horizon) view, no copy
+    windows = series.unfold(0, seq_length + horizon, 1)
+    if shuffle:
+        order = torch.randperm(len(windows), device=series.device)
+    else:
+        order = torch.arange(len(windows), device=series.device)
+
+    for i in range(0, len(windows), batch_size):
+        batch = windows[order[i:i + batch_size]].transpose(1, 2)
+        batch_X = batch[:, :seq_length].contiguous()
+        batch_y = batch[:, seq_length:].reshape(len(batch), -1)
+        # Univariate targets are a flat vector, as the model output is squeezed to one
+        if batch_y.shape[1] == 1:
+            batch_y = batch_y[:, 0]
+        yield batch_X, batch_y
+
+
+def train_model(model, scaled_data, seq_length, epochs, batch_size, device, horizon=1, shuffle=True):
+    """
+    Trains model to predict the `horizon` rows of scaled_data (days x features) that
+    follow each run of seq_length rows, visiting the windows in a new random order
+    every epoch.
+    """
+    series = torch.tensor(scaled_data, dtype=torch.float32, device=device)
+    
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters())
+    
+    # Train model
+    for epoch in range(epochs):
+        model.train()
+        for batch_X, batch_y in window_batches(series, seq_length, horizon, batch_size, shuffle):
+            # Forward pass
+            outputs = model(batch_X).reshape(batch_y.shape)
+            loss = criterion(outputs, batch_y)
+            
+            # Backward and optimize
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+    return model
+
+
+def predict_rollout(model, scaled_data, seq_length, forecast_periods, device):
+    """
+    Forecasts forecast_periods days after scaled_data (days x features) with model.rollout:
+    one forward pass per day for autoregressive models, per horizon for direct ones.
+    Returns (forecast_periods, features) scaled values.
+    """
+    model.eval()
+    n_features = scaled_data.shape[1]
+    current_batch = torch.tensor(scaled_data[-seq_length:].reshape(1, seq_length, n_features), dtype=torch.float32).to(device)
+
+    with torch.no_grad():
+        predictions = model.rollout(current_batch, forecast_periods)
+
+    return predictions.cpu().numpy().astype(np.float64)
+
+
+def script_forecaster(forecaster):
+    """
+    The forecaster with its models compiled to TorchScript, so the rollout loop runs
+    without Python overhead per day. Scripted models can't be trained, so
+    fine_tune_forecaster copies their weights back into LSTMModels first.
+    """
+    models = [(torch.jit.script(model.eval()), scaler, columns) for model, scaler, columns in forecaster["models"]]
+    return dict(forecaster, models=models)
+
+
+def train_forecaster(df, seq_length=10, epochs=50, batch_size=32, device=None, kind="per_column", horizon=1):
+    """
+    Trains the models of a forecaster for the columns of df.
+
+    Returns {"kind", "seq_length", "horizon", "models": [(model, scaler, columns)]}: one
+    entry per column for "per_column", a single entry covering every column for
+    "multivariate". horizon=1 gives autoregressive models, larger horizons direct ones.
+    """
+    device = device or get_device()
+    if kind == "per_column":
+        column_groups = [[column] for column in df.columns]
+    elif kind == "multivariate":
+        column_groups = [list(df.columns)]
     else:
-        device = torch.device("cpu")
+        raise ValueError(f"Unknown forecaster kind {kind!r}")
+
+    models = []
+    for columns in column_groups:
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaled_data = scaler.fit_transform(df[columns].values)
+
+        model = LSTMModel(seq_length, n_features=len(columns), n_outputs=len(columns), horizon=horizon).to(device)
+        train_model(model, scaled_data, seq_length, epochs, batch_size, device, horizon)
+        models.append((model, scaler, columns))
+    return {"kind": kind, "seq_length": seq_length, "horizon": horizon, "models": models}
+
+
+def forecaster_bundle(forecaster, trained_until):
+    """Plain tensors and numbers that model_registry can save and load_forecaster restore."""
+    return {
+        "kind": forecaster["kind"],
+        "seq_length": forecaster["seq_length"],
+        "horizon": forecaster["horizon"],
+        "trained_until": str(trained_until),
+        "models": [
+            {
+                "columns": columns,
+                "state_dict": {key: value.detach().cpu() for key, value in model.state_dict().items()},
+                "data_min": [float(value) for value in scaler.data_min_],
+                "data_max": [float(value) for value in scaler.data_max_],
+            }
+            for model, scaler, columns in forecaster["models"]
+        ],
+    }
+
+
+def load_forecaster(bundle):
+    device = get_device()
+    seq_length = bundle["seq_length"]
+    # Bundles saved before direct models existed are autoregressive
+    horizon = bundle.get("horizon", 1)
+    models = []
+    for saved in bundle["models"]:
+        columns = saved["columns"]
+        model = LSTMModel(seq_length, n_features=len(columns), n_outputs=len(columns), horizon=horizon)
+        model.load_state_dict(saved["state_dict"])
+        model.to(device).eval()
+        models.append((model, range_scaler(saved["data_min"], saved["data_max"]), columns))
+    forecaster = {"kind": bundle["kind"], "seq_length": seq_length, "horizon": horizon, "models": models}
+    # Compiled once per worker process; model_registry then keeps the compiled models
+    if INFERENCE_BACKEND == "torchscript":
+        forecaster = script_forecaster(forecaster)
+    return forecaster
+
+
+def fine_tune_forecaster(forecaster, df, epochs, batch_size=32, device=None):
+    """
+    Briefly trains copies of a pretrained forecaster's models on recent data. The
+    copies keep the pretrained scalers; the shared cached models are left untouched.
+    Compiled models are copied back into trainable LSTMModels first.
+    """
+    device = device or get_device()
+    seq_length = forecaster["seq_length"]
+    horizon = forecaster["horizon"]
+    models = []
+    for model, scaler, columns in forecaster["models"]:
+        pretrained = model
+        model = LSTMModel(seq_length, n_features=len(columns), n_outputs=len(columns), horizon=horizon)
+        model.load_state_dict(pretrained.state_dict())
+        model.to(device)
+        scaled_data = scaler.transform(df[columns].values)
+        train_model(model, scaled_data, seq_length, epochs, batch_size, device, horizon)
+        models.append((model, scaler, columns))
+    return {"kind": forecaster["kind"], "seq_length": seq_length, "horizon": horizon, "models": models}
+
+
+def forecast_lstm(df, forecast_periods=180, seq_length=10, epochs=50, batch_size=32,
+                  forecaster=None, fine_tune_epochs=0, kind="per_column", horizon=1):
+    """
+    Forecasts every column of df for forecast_periods days.
+
+    With a pretrained forecaster (see model_registry) only inference runs, optionally
+    after fine_tune_epochs of training on the last FINE_TUNE_DAYS days. Without one, a
+    forecaster of the given kind and horizon is trained from scratch first.
+    Autoregressive forecasters (horizon 1) take one forward pass per day, direct ones
+    one pass per horizon.
+
+    Returns the forecast frame and {column: model}; with the multivariate kind every
+    column maps to the same model.
+    """
+    device = get_device()
     
     print(f"Using device: {device}")
     
@@ -124,79 +480,111 @@ def forecast_lstm(df, forecast_periods=180, seq_length=10, epochs=50, batch_size
     future_dates = pd.date_range(start=forecast_start_date + pd.Timedelta(days=1), 
                                 periods=forecast_periods)
     forecast_df = pd.DataFrame(index=future_dates)
+
+    if forecaster is None:
+        forecaster = train_forecaster(df, seq_length, epochs, batch_size, device, kind, horizon)
+    elif fine_tune_epochs > 0:
+        forecaster = fine_tune_forecaster(forecaster, df.tail(FINE_TUNE_DAYS), fine_tune_epochs, batch_size, device)
+    seq_length = forecaster["seq_length"]
+    horizon = forecaster["horizon"]
     
     models = {}
     
-    for column in df.columns:
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(df[column].values.reshape(-1, 1))
-        
-        X, y = [], []
-        for i in range(len(scaled_data) - seq_length):
-            X.append(scaled_data[i:(i + seq_length), 0])
-            y.append(scaled_data[i + seq_length, 0])
-        X, y = np.array(X), np.array(y)
-        
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
-        
-        # Convert to torch tensors
-        X = torch.tensor(X, dtype=torch.float32).to(device)
-        y = torch.tensor(y, dtype=torch.float32).to(device)
-        
-        # Create model
-        model = LSTMModel(seq_length).to(device)
-        criterion = nn.MSELoss()
-        optimizer = torch.optim.Adam(model.parameters())
-        
-        # Train model
-        for epoch in range(epochs):
-            model.train()
-            for i in range(0, len(X), batch_size):
-                batch_X = X[i:i+batch_size]
-                batch_y = y[i:i+batch_size]
-                
-                # Forward pass
-                outputs = model(batch_X).squeeze()
-                loss = criterion(outputs, batch_y)
-                
-                # Backward and optimize
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
-        
-        models[column] = model
-        
-        # Make predictions
-        model.eval()
-        predictions = []
-        current_batch = torch.tensor(scaled_data[-seq_length:].reshape(1, seq_length, 1), dtype=torch.float32).to(device)
-        
-        with torch.no_grad():
-            for i in range(forecast_periods):
-                # Get prediction
-                pred = model(current_batch)
-                current_pred = pred.item()
-                
-                predictions.append(current_pred)
-                
-                # Create a completely new tensor instead of trying to modify in place
-                # This avoids the memory overlap error
-                next_input = torch.zeros_like(current_batch)
-                # Shift values - copy all but first element
-                next_input[0, 0:seq_length-1, 0] = current_batch[0, 1:seq_length, 0]
-                # Add the new prediction at the end
-                next_input[0, -1, 0] = current_pred
-                
-                current_batch = next_input
+    for model, scaler, columns in forecaster["models"]:
+        scaled_data = scaler.transform(df[columns].values)
+        predictions = predict_rollout(model, scaled_data, seq_length, forecast_periods, device)
         
         # Inverse transform predictions
-        predictions = scaler.inverse_transform(np.array(predictions).reshape(-1, 1))
-        forecast_df[column] = predictions
+        predictions = scaler.inverse_transform(predictions)
+        for i, column in enumerate(columns):
+            forecast_df[column] = predictions[:, i]
+            models[column] = model
     
     return forecast_df, models
 
 
-def create_interactive_plots(df, output_file="weather.html"):
+# Pretrained per-cell models; build them offline with `python train_models.py`
+model_registry = ModelRegistry(
+    os.environ.get("MODEL_REGISTRY_PATH", "models"),
+    load_forecaster,
+    grid_size=float(os.environ.get("MODEL_GRID", "1.0")),
+    cache_size=int(os.environ.get("MODEL_CACHE_SIZE", "16"))
+)
+# Forecaster kind and mode used when /get_weather doesn't pass model=... / mode=...
+DEFAULT_FORECASTER_KIND = os.environ.get("FORECAST_MODEL", "per_column")
+if DEFAULT_FORECASTER_KIND not in FORECASTER_KINDS:
+    raise ValueError(f"FORECAST_MODEL must be one of {', '.join(FORECASTER_KINDS)}")
+DEFAULT_FORECAST_MODE = os.environ.get("FORECAST_MODE", "autoregressive")
+if DEFAULT_FORECAST_MODE not in FORECAST_MODES:
+    raise ValueError(f"FORECAST_MODE must be one of {', '.join(FORECAST_MODES)}")
+
+
+def registry_kind(kind, mode):
+    """Name under which model_registry keeps forecasters of this kind and mode."""
+    return kind if mode == "autoregressive" else f"{kind}_{mode}"
+
+
+def mode_horizon(mode):
+    return 1 if mode == "autoregressive" else DIRECT_HORIZON
+
+# Recent history used when /get_weather?fine_tune=1
+FINE_TUNE_DAYS = 180
+FINE_TUNE_EPOCHS = int(os.environ.get("FINE_TUNE_EPOCHS", "5"))
+
+
+# include_plotlyjs for the forecast plots: "cdn" references plotly.js from the CDN,
+# "directory" writes one shared plotly.min.js next to them, True inlines it (several MB)
+PLOTLY_JS = os.environ.get("PLOTLY_JS", "cdn")
+PLOT_OUTPUT_FOLDER = "output"
+# Most weather_<hash>.html plots kept in PLOT_OUTPUT_FOLDER; the least recently used go first
+PLOT_CACHE_SIZE = int(os.environ.get("PLOT_CACHE_SIZE", "256"))
+
+
+def plot_key(df):
+    """Hash of a forecast frame's dates, columns and values; identical forecasts share a plot file."""
+    digest = hashlib.sha1()
+    digest.update(str(PLOTLY_JS).encode())
+    digest.update(",".join(map(str, df.columns)).encode())
+    digest.update(pd.to_datetime(df.index).asi8.tobytes())
+    digest.update(np.ascontiguousarray(df.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()[:20]
+
+
+def prune_plots(keep):
+    """Deletes all but the `keep` most recently used weather_<hash>.html plots."""
+    plots = []
+    for path in glob.glob(os.path.join(PLOT_OUTPUT_FOLDER, "weather_*.html")):
+        try:
+            plots.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            # Already pruned by another request
+            continue
+    plots.sort(reverse=True)
+    for _, path in plots[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+
+
+def create_interactive_plots(df, output_file=None):
+    """
+    Writes the forecast plots to output/<output_file>, by default weather_<hash>.html named
+    after the forecast data, and returns the path. An existing file for the same data is
+    reused instead of being rendered again. Only the PLOT_CACHE_SIZE most recently used
+    plots are kept.
+    """
+    if output_file is None:
+        output_file = f"weather_{plot_key(df)}.html"
+    output_path = f"{PLOT_OUTPUT_FOLDER}/{output_file}"
+    if os.path.exists(output_path):
+        try:
+            # Marks the plot as recently used for prune_plots
+            os.utime(output_path)
+            return output_path
+        except FileNotFoundError:
+            pass
+
     df = df.copy()
     
     if 'Unnamed: 0' in df.columns:
@@ -254,36 +642,58 @@ def create_interactive_plots(df, output_file="weather.html"):
         margin=dict(l=50, r=50, t=50, b=50),
     )
     
-    output_folder = "output"
-    os.makedirs(output_folder, exist_ok=True)
+    os.makedirs(PLOT_OUTPUT_FOLDER, exist_ok=True)
     
-    output_path = os.path.join(output_folder, output_file)
-    fig.write_html(output_path)
+    # Write under a temporary name so concurrent requests never serve a partial file
+    temp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fig.write_html(temp_path, include_plotlyjs=PLOTLY_JS)
+    os.replace(temp_path, output_path)
+    prune_plots(PLOT_CACHE_SIZE)
+    return output_path
 
 
-@app.route('/get_weather', methods=['GET'])
-def get_data():
-    lat = request.args.get('lat', type=float)
-    lon = request.args.get('lon', type=float)
+def forecast_options(params):
+    """(kind, mode, fine_tune) from request parameters; raises ValueError for invalid values."""
+    kind = params.get('model', DEFAULT_FORECASTER_KIND)
+    if kind not in FORECASTER_KINDS:
+        raise ValueError(f"model must be one of {', '.join(FORECASTER_KINDS)}")
+    mode = params.get('mode', DEFAULT_FORECAST_MODE)
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"mode must be one of {', '.join(FORECAST_MODES)}")
+    try:
+        fine_tune = bool(int(params.get('fine_tune', 0)))
+    except (TypeError, ValueError):
+        raise ValueError("fine_tune must be 0 or 1")
+    return kind, mode, fine_tune
+
 
+def weather_forecast(lat, lon, kind=DEFAULT_FORECASTER_KIND, mode=DEFAULT_FORECAST_MODE, fine_tune=False):
+    """The /get_weather pipeline: fetch history, load or train the models, forecast and plot."""
     forecast_period=120
 
-    weather_df = fetch_weather_data(lat, lon, delay=2) 
+    weather_df = fetch_weather_data(lat, lon)
 
     weather_df.set_index("date", inplace=True)
     weather_df.index = pd.to_datetime(weather_df.index)
-    forecast_df, models = forecast_lstm(weather_df, forecast_periods=forecast_period)
+
+    # Use the cell's pretrained models; train and register them on first use
+    cell = model_registry.cell(lat, lon)
+    forecaster = model_registry.get(cell, registry_kind(kind, mode))
+    if forecaster is None:
+        forecaster = train_forecaster(weather_df, kind=kind, horizon=mode_horizon(mode))
+        model_registry.save(cell, forecaster_bundle(forecaster, weather_df.index[-1].date()),
+                            registry_kind(kind, mode))
+
+    fine_tune_epochs = FINE_TUNE_EPOCHS if fine_tune else 0
+    forecast_df, models = forecast_lstm(weather_df, forecast_periods=forecast_period,
+                                        forecaster=forecaster, fine_tune_epochs=fine_tune_epochs)
     
-    create_interactive_plots(forecast_df)
-    weather_graph_path="output/weather.html"
+    weather_graph_path = create_interactive_plots(forecast_df)
 
     avg_temperature = forecast_df['Temperature'].mean()
     avg_humidity = forecast_df['Humidity'].mean()
     avg_rainfall = forecast_df['Rainfall'].mean()
     
-    if lat is None or lon is None:
-        return jsonify({"error": "Missing lat or lon parameters"}), 400
-    
     output = {}
 
     output['avg_temperature'] = round(float(avg_temperature),2)
@@ -291,7 +701,68 @@ def get_data():
     output['avg_rainfall'] = round(float(avg_rainfall),2)
     output['weather_graph_path'] = weather_graph_path
 
+    return output
+
+
+# POST /get_weather runs weather_forecast in worker processes, so training doesn't
+# hold up the Flask workers or compete for the GIL. Job state is kept next to the
+# weather history, so every Flask process on the host can report any job
+weather_jobs = JobQueue(
+    weather_forecast,
+    weather_store.path,
+    max_workers=int(os.environ.get("WEATHER_JOB_WORKERS", "2")),
+    result_ttl=int(os.environ.get("WEATHER_JOB_TTL", "3600")),
+    job_timeout=int(os.environ.get("WEATHER_JOB_TIMEOUT", "3600"))
+)
+
+
+@app.route('/get_weather', methods=['GET'])
+def get_data():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    
+    if lat is None or lon is None:
+        return jsonify({"error": "Missing lat or lon parameters"}), 400
+
+    try:
+        kind, mode, fine_tune = forecast_options(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    output = weather_forecast(lat, lon, kind, mode, fine_tune)
+
     return jsonify(output)
 
+
+@app.route('/get_weather', methods=['POST'])
+def submit_weather_job():
+    """
+    Queues a forecast and returns its job id right away; poll GET /get_weather/<job_id>.
+    Takes the same parameters as GET /get_weather, as a JSON body or query string.
+    """
+    params = request.get_json(silent=True) or request.values
+    try:
+        lat = float(params['lat'])
+        lon = float(params['lon'])
+        kind, mode, fine_tune = forecast_options(params)
+    except KeyError:
+        return jsonify({"error": "Missing lat or lon parameters"}), 400
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    job_id, merged = weather_jobs.submit((lat, lon, kind, mode, fine_tune), lat, lon, kind, mode, fine_tune)
+    output = weather_jobs.status(job_id)
+    output['merged'] = merged
+    return jsonify(output), 202, {"Location": f"/get_weather/{job_id}"}
+
+
+@app.route('/get_weather/<job_id>', methods=['GET'])
+def get_weather_job(job_id):
+    output = weather_jobs.status(job_id)
+    if output is None:
+        return jsonify({"error": "Unknown or expired job id"}), 404
+    return jsonify(output)
+
+
 if __name__ == '__main__':
     app.run(debug=True,port=5500)
\ No newline at end of file
@@ -0,0 +1,535 @@
+from rasterio.windows import Window
+from rasterio.crs import CRS
+from affine import Affine
+from pyproj import Transformer
+import numpy as np
+import rasterio
+import argparse
+import threading
+import hashlib
+import json
+import glob
+import os
+
+# Written next to the rasters by `python rasters.py stats`
+STATS_SIDECAR = "raster_stats.json"
+
+# Rows per chunk when scanning a memory-mapped band
+MEMMAP_CHUNK_ROWS = 1024
+# Largest window (in cells) read_pixels decodes in one go; wider point spreads are read block by block
+READ_PIXELS_MAX_WINDOW = 1_000_000
+
+
+def list_raster_files(folder_path):
+    """Returns the .asc and .tif raster files found in folder_path."""
+    return glob.glob(os.path.join(folder_path, "*.asc")) + glob.glob(os.path.join(folder_path, "*.tif"))
+
+
+def dataset_blocks(dataset):
+    """Yields band 1 of a rasterio dataset one block window at a time."""
+    for _, window in dataset.block_windows(1):
+        yield dataset.read(1, window=window)
+
+
+def array_blocks(array):
+    """Yields a 2-D (possibly memory-mapped) array in chunks of rows."""
+    for row in range(0, array.shape[0], MEMMAP_CHUNK_ROWS):
+        yield array[row:row + MEMMAP_CHUNK_ROWS]
+
+
+def compute_band_stats(blocks, nodata):
+    """
+    Computes min, max, mean and nodata count of a band from an iterable of blocks, so
+    the whole band is never held in memory.
+
+    min and max are taken over every cell, nodata included, exactly as the original
+    full-band `read(1).min()` normalisation did. mean covers valid cells only.
+    """
+    min_val = None
+    max_val = None
+    total = 0.0
+    valid_count = 0
+    nodata_count = 0
+    for block in blocks:
+        if block.size == 0:
+            continue
+        block_min = block.min()
+        block_max = block.max()
+        min_val = block_min if min_val is None else min(min_val, block_min)
+        max_val = block_max if max_val is None else max(max_val, block_max)
+
+        if nodata is not None:
+            invalid = (block == nodata) | np.isnan(block)
+        else:
+            invalid = np.isnan(block)
+        valid = block[~invalid]
+        nodata_count += int(invalid.sum())
+        valid_count += valid.size
+        total += float(valid.sum(dtype=np.float64))
+
+    return {
+        "min": float(min_val) if min_val is not None else None,
+        "max": float(max_val) if max_val is not None else None,
+        "mean": total / valid_count if valid_count else None,
+        "nodata_count": nodata_count,
+    }
+
+
+def file_hash(path):
+    """SHA-1 of the file contents, used to key the statistics sidecar."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_stats_sidecar(folder_path):
+    sidecar_path = os.path.join(folder_path, STATS_SIDECAR)
+    if not os.path.exists(sidecar_path):
+        return {}
+    with open(sidecar_path) as f:
+        return json.load(f)
+
+
+def build_stats_sidecar(folder_path):
+    """
+    Computes statistics for every raster in folder_path and writes them to the sidecar,
+    keyed by file hash. Run this offline whenever the rasters change.
+    """
+    sidecar = {}
+    for raster_path in sorted(list_raster_files(folder_path)):
+        with rasterio.open(raster_path) as dataset:
+            stats = compute_band_stats(dataset_blocks(dataset), dataset.nodata)
+        stats["file"] = os.path.basename(raster_path)
+        sidecar[file_hash(raster_path)] = stats
+        print(f"{stats['file']}: min={stats['min']} max={stats['max']} "
+              f"mean={stats['mean']} nodata={stats['nodata_count']}")
+
+    sidecar_path = os.path.join(folder_path, STATS_SIDECAR)
+    tmp_path = sidecar_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(sidecar, f, indent=2)
+    os.replace(tmp_path, sidecar_path)
+    return sidecar
+
+
+def cache_paths(cache_folder, raster_path):
+    """Array and metadata paths of a raster's entry in the memory-map cache."""
+    base = os.path.join(cache_folder, os.path.basename(raster_path))
+    return base + ".npy", base + ".json"
+
+
+def read_cache_metadata(cache_folder, raster_path):
+    _, meta_path = cache_paths(cache_folder, raster_path)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def convert_folder(folder_path, cache_folder):
+    """
+    Writes every raster in folder_path to cache_folder as a raw .npy array plus a
+    metadata JSON. Lookups memory-map these arrays, so every worker process on a host
+    shares the same page-cache pages instead of parsing .asc text into its own memory.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    for raster_path in sorted(list_raster_files(folder_path)):
+        array_path, meta_path = cache_paths(cache_folder, raster_path)
+        with rasterio.open(raster_path) as dataset:
+            band = dataset.read(1)
+            metadata = {
+                "source_hash": file_hash(raster_path),
+                "source_size": os.path.getsize(raster_path),
+                "source_mtime": os.path.getmtime(raster_path),
+                "crs": dataset.crs.to_wkt() if dataset.crs else None,
+                "transform": list(dataset.transform)[:6],
+                "nodata": dataset.nodata,
+                "height": dataset.height,
+                "width": dataset.width,
+                "dtype": dataset.dtypes[0],
+            }
+
+        # Write to temporary names first so running workers never map a half-written file
+        with open(array_path + ".tmp", "wb") as f:
+            np.save(f, band)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(array_path + ".tmp", array_path)
+        os.replace(meta_path + ".tmp", meta_path)
+        print(f"{os.path.basename(raster_path)} -> {array_path}")
+
+
+class TransformerCache:
+    """
+    Shares pyproj Transformers between raster lookups.
+
+    Building a Transformer is far more expensive than using one, and most rasters share
+    a CRS, so each (source, target) pair is built once per process.
+    """
+
+    def __init__(self):
+        self._transformers = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source_crs, target_crs):
+        key = (str(source_crs), str(target_crs))
+        transformer = self._transformers.get(key)
+        if transformer is not None:
+            self.hits += 1
+            return transformer
+
+        with self._lock:
+            transformer = self._transformers.get(key)
+            if transformer is None:
+                self.misses += 1
+                transformer = Transformer.from_crs(source_crs, target_crs, always_xy=True)
+                self._transformers[key] = transformer
+            else:
+                self.hits += 1
+        return transformer
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._transformers)}
+
+
+class RasterEntry:
+    """
+    A raster plus the metadata needed to serve point lookups from it.
+
+    The band is read from a memory-mapped array when the cache folder holds an
+    up-to-date copy of the file, and from an open rasterio handle otherwise. The handle
+    stays open for the lifetime of the entry. GDAL handles are not safe to read from
+    several threads at once, so reads must hold `lock`.
+    """
+
+    def __init__(self, path, stats_sidecar=None, cache_folder=None):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.file_name = os.path.splitext(os.path.basename(path))[0]
+        self.lock = threading.Lock()
+        self.dataset = None
+        self.array = None
+
+        metadata = read_cache_metadata(cache_folder, path) if cache_folder else None
+        if metadata is not None and self._cache_is_current(metadata):
+            array_path, _ = cache_paths(cache_folder, path)
+            self.array = np.load(array_path, mmap_mode="r")
+            self.crs = CRS.from_wkt(metadata["crs"]) if metadata["crs"] else None
+            self.transform = Affine(*metadata["transform"])
+            self.nodata = metadata["nodata"]
+            self.height = metadata["height"]
+            self.width = metadata["width"]
+            self.dtype = metadata["dtype"]
+        else:
+            self.file_hash = file_hash(path)
+            self.dataset = rasterio.open(path)
+            self.crs = self.dataset.crs
+            self.transform = self.dataset.transform
+            self.nodata = self.dataset.nodata
+            self.height = self.dataset.height
+            self.width = self.dataset.width
+            self.dtype = self.dataset.dtypes[0]
+
+        # Precomputed statistics are used when the sidecar has this exact file
+        self._stats = (stats_sidecar or {}).get(self.file_hash)
+
+    def _cache_is_current(self, metadata):
+        # Trust the cached hash while size and mtime are unchanged, which keeps cold
+        # starts from re-reading every source file; otherwise hash and compare
+        if (metadata["source_size"] == os.path.getsize(self.path)
+                and metadata["source_mtime"] == self.mtime):
+            self.file_hash = metadata["source_hash"]
+        else:
+            self.file_hash = file_hash(self.path)
+        return self.file_hash == metadata["source_hash"]
+
+    def read_pixel(self, row, col):
+        """Reads a single cell through a 1x1 window instead of decoding the whole band."""
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError(f"Pixel ({row}, {col}) is outside the raster extent")
+        if self.array is not None:
+            return self.array[row, col]
+        with self.lock:
+            return self.dataset.read(1, window=Window(col, row, 1, 1))[0, 0]
+
+    def read_pixels(self, rows, cols):
+        """
+        Reads many cells at once. rows and cols are integer arrays of in-bounds pixel
+        indices. Points close together are read through the one window covering them
+        all; scattered points are grouped by the file's internal blocks and only the
+        blocks holding a point are decoded, one at a time.
+        """
+        if self.array is not None:
+            return self.array[rows, cols]
+        row_off = int(rows.min())
+        col_off = int(cols.min())
+        height = int(rows.max()) - row_off + 1
+        width = int(cols.max()) - col_off + 1
+        if height * width <= READ_PIXELS_MAX_WINDOW:
+            with self.lock:
+                block = self.dataset.read(1, window=Window(col_off, row_off, width, height))
+            return block[rows - row_off, cols - col_off]
+
+        block_height, block_width = self.dataset.block_shapes[0]
+        block_ids, points = np.unique(np.column_stack([rows // block_height, cols // block_width]),
+                                      axis=0, return_inverse=True)
+        # Points ordered by block, so each block's points are one contiguous run
+        order = np.argsort(points.reshape(-1), kind="stable")
+        starts = np.searchsorted(points.reshape(-1)[order], np.arange(len(block_ids) + 1))
+        values = np.empty(len(rows), dtype=self.dtype)
+        for (block_row, block_col), start, stop in zip(block_ids, starts[:-1], starts[1:]):
+            block_row_off = int(block_row) * block_height
+            block_col_off = int(block_col) * block_width
+            window = Window(block_col_off, block_row_off,
+                            min(block_width, self.width - block_col_off),
+                            min(block_height, self.height - block_row_off))
+            with self.lock:
+                block = self.dataset.read(1, window=window)
+            in_block = order[start:stop]
+            values[in_block] = block[rows[in_block] - block_row_off, cols[in_block] - block_col_off]
+        return values
+
+    def read_window(self, window):
+        """Reads band 1 inside an in-bounds integer Window."""
+        if self.array is not None:
+            return np.asarray(self.array[window.row_off:window.row_off + window.height,
+                                         window.col_off:window.col_off + window.width])
+        with self.lock:
+            return self.dataset.read(1, window=window)
+
+    def read_band(self):
+        if self.array is not None:
+            return np.array(self.array)
+        with self.lock:
+            return self.dataset.read(1)
+
+    @property
+    def grid_key(self):
+        """Rasters with equal grid keys line up cell for cell and can share a cube."""
+        return (self.height, self.width, tuple(self.transform), str(self.crs), self.dtype)
+
+    @property
+    def stats(self):
+        """
+        Band statistics from the sidecar, or computed on first use when the sidecar is
+        missing or stale. Either way they are kept until the file changes.
+        """
+        if self._stats is None:
+            with self.lock:
+                if self._stats is None:
+                    print(f"No precomputed statistics for {self.path}; "
+                          f"run `python rasters.py stats` to build them")
+                    if self.array is not None:
+                        self._stats = compute_band_stats(array_blocks(self.array), self.nodata)
+                    else:
+                        self._stats = compute_band_stats(dataset_blocks(self.dataset), self.nodata)
+        return self._stats
+
+    def close(self):
+        with self.lock:
+            if self.dataset is not None:
+                self.dataset.close()
+            # The memmap is unmapped once the last reference to it goes away
+            self.array = None
+
+
+def cube_cache_path(cache_folder, entries):
+    """Path of the stacked cube for these exact member files in the memory-map cache."""
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(f"{os.path.basename(entry.path)}:{entry.file_hash}\n".encode())
+    return os.path.join(cache_folder, f"cube_{digest.hexdigest()}.npy")
+
+
+class RasterCube:
+    """
+    Rasters that share one grid, stacked into a single (layers, rows, cols) array so a
+    point lookup across every layer is one fancy-index operation.
+
+    When every member is memory-mapped from cache_folder, the stack is written there
+    as well and mapped, so worker processes share it instead of each holding a copy.
+    """
+
+    def __init__(self, entries, cache_folder=None):
+        self.entries = entries
+        first = entries[0]
+        self.crs = first.crs
+        self.transform = first.transform
+        self.height = first.height
+        self.width = first.width
+        if cache_folder and all(entry.array is not None for entry in entries):
+            self.data = self._mapped_stack(cache_folder)
+        else:
+            self.data = np.stack([entry.read_band() for entry in entries])
+
+    def _mapped_stack(self, cache_folder):
+        cube_path = cube_cache_path(cache_folder, self.entries)
+        if not os.path.exists(cube_path):
+            # Filled one layer at a time; the temporary name is per process so workers
+            # building the same cube at once never write into each other's file
+            tmp_path = f"{cube_path}.{os.getpid()}.tmp"
+            shape = (len(self.entries), self.height, self.width)
+            stacked = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.entries[0].array.dtype,
+                                                shape=shape)
+            for layer, entry in enumerate(self.entries):
+                stacked[layer] = entry.array
+            stacked.flush()
+            del stacked
+            os.replace(tmp_path, cube_path)
+        return np.load(cube_path, mmap_mode="r")
+
+    def sample(self, layers, rows, cols):
+        """
+        Values of the given layers at the given cells. rows and cols may be scalars or
+        arrays; the result has one row per layer and one column per cell.
+        """
+        layers = np.asarray(layers)
+        return self.data[layers[:, None], np.atleast_1d(rows)[None, :], np.atleast_1d(cols)[None, :]]
+
+
+class RasterRegistry:
+    """
+    Process-wide pool of open raster datasets.
+
+    Each file is opened once and kept open. A file is reopened only when its
+    modification time changes, so edits to gis_data are picked up without a restart.
+
+    With preload_cubes, rasters on a shared grid are also held in memory as RasterCubes.
+    When cache_folder is set, rasters converted with `python rasters.py convert` are
+    memory-mapped from it instead.
+    """
+
+    def __init__(self, cache_folder=None):
+        self.cache_folder = cache_folder
+        self._entries = {}
+        self._sidecars = {}
+        self._cubes = {}
+        self._cube_folder = None
+        self._lock = threading.Lock()
+
+    @property
+    def cubes_enabled(self):
+        return self._cube_folder is not None
+
+    def preload_cubes(self, folder_path):
+        """
+        Groups the rasters in folder_path by grid and stacks every group of two or more
+        into a RasterCube. Rasters on a grid of their own keep the per-file path.
+        """
+        groups = {}
+        for raster_path in sorted(list_raster_files(folder_path)):
+            try:
+                entry = self.get(raster_path)
+            except Exception as e:
+                print(f"Error opening {raster_path}: {str(e)}")
+                continue
+            groups.setdefault(entry.grid_key, []).append(entry)
+
+        cubes = {}
+        for entries in groups.values():
+            if len(entries) < 2:
+                continue
+            cube = RasterCube(entries, self.cache_folder)
+            for layer, entry in enumerate(entries):
+                cubes[entry.path] = (cube, layer)
+
+        self._cubes = cubes
+        self._cube_folder = folder_path
+
+    def group_by_cube(self, raster_paths):
+        """
+        Splits raster_paths into [(cube, layers)] for rasters held in a cube and a list of
+        the paths that must be read per file. Cubes are rebuilt when a member changes.
+        """
+        for attempt in range(2):
+            grouped = {}
+            remaining = []
+            stale = False
+            for raster_path in raster_paths:
+                found = self._cubes.get(raster_path)
+                if found is None:
+                    remaining.append(raster_path)
+                    continue
+                cube, layer = found
+                if self.get(raster_path) is not cube.entries[layer]:
+                    stale = True
+                    break
+                grouped.setdefault(id(cube), (cube, []))[1].append(layer)
+
+            if not stale:
+                return list(grouped.values()), remaining
+            if attempt == 0:
+                self.preload_cubes(self._cube_folder)
+
+        return [], list(raster_paths)
+
+    def load_folder(self, folder_path):
+        """Opens every raster in folder_path up front so the first request doesn't pay for it."""
+        for raster_path in list_raster_files(folder_path):
+            try:
+                self.get(raster_path)
+            except Exception as e:
+                print(f"Error opening {raster_path}: {str(e)}")
+
+    def get(self, raster_path):
+        mtime = os.path.getmtime(raster_path)
+        entry = self._entries.get(raster_path)
+        if entry is not None and entry.mtime == mtime:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(raster_path)
+            if entry is not None and entry.mtime == mtime:
+                return entry
+
+            new_entry = RasterEntry(raster_path, self._stats_sidecar(os.path.dirname(raster_path)),
+                                    self.cache_folder)
+            self._entries[raster_path] = new_entry
+
+        if entry is not None:
+            entry.close()
+        return new_entry
+
+    def _stats_sidecar(self, folder_path):
+        # Re-read the sidecar only when it has been rebuilt
+        sidecar_path = os.path.join(folder_path, STATS_SIDECAR)
+        mtime = os.path.getmtime(sidecar_path) if os.path.exists(sidecar_path) else None
+        cached = self._sidecars.get(folder_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_stats_sidecar(folder_path))
+            self._sidecars[folder_path] = cached
+        return cached[1]
+
+    def close(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
+
+
+# Shared by every request handled by this process
+registry = RasterRegistry()
+transformers = TransformerCache()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline maintenance for the GIS raster folder")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="Rebuild the per-raster statistics sidecar")
+    stats_parser.add_argument("--folder", default="gis_data")
+
+    convert_parser = subparsers.add_parser("convert", help="Write rasters to the memory-map cache")
+    convert_parser.add_argument("--folder", default="gis_data")
+    convert_parser.add_argument("--cache", default="gis_cache")
+
+    args = parser.parse_args()
+    if args.command == "stats":
+        build_stats_sidecar(args.folder)
+    elif args.command == "convert":
+        convert_folder(args.folder, args.cache)
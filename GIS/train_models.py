@@ -0,0 +1,56 @@
+"""
+Offline training for the /get_weather forecasting models.
+
+Trains the forecaster for the grid cell around each location and saves it to the model
+registry, so requests only load the model and run inference.
+
+    python train_models.py --lat 19.0760 --lon 72.8777
+    python train_models.py --locations locations.csv    # CSV with lat,lon columns
+    python train_models.py --lat 19.0760 --lon 72.8777 --model multivariate --mode direct
+"""
+import argparse
+import pandas as pd
+from main import (fetch_weather_data, train_forecaster, forecaster_bundle, model_registry,
+                  registry_kind, mode_horizon, FORECASTER_KINDS, FORECAST_MODES,
+                  DEFAULT_FORECASTER_KIND, DEFAULT_FORECAST_MODE)
+
+
+def train_location(lat, lon, epochs=50, kind=DEFAULT_FORECASTER_KIND, mode=DEFAULT_FORECAST_MODE):
+    weather_df = fetch_weather_data(lat, lon)
+    if weather_df.empty:
+        print(f"No weather history for ({lat}, {lon}); skipped")
+        return
+
+    weather_df.set_index("date", inplace=True)
+    weather_df.index = pd.to_datetime(weather_df.index)
+
+    cell = model_registry.cell(lat, lon)
+    forecaster = train_forecaster(weather_df, epochs=epochs, kind=kind, horizon=mode_horizon(mode))
+    model_registry.save(cell, forecaster_bundle(forecaster, weather_df.index[-1].date()), registry_kind(kind, mode))
+    print(f"Saved {model_registry.path_for(cell, registry_kind(kind, mode))}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train and register weather forecasting models")
+    parser.add_argument("--lat", type=float)
+    parser.add_argument("--lon", type=float)
+    parser.add_argument("--locations", help="CSV file with lat and lon columns")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--model", choices=FORECASTER_KINDS, default=DEFAULT_FORECASTER_KIND)
+    parser.add_argument("--mode", choices=FORECAST_MODES, default=DEFAULT_FORECAST_MODE)
+    args = parser.parse_args()
+
+    if args.locations:
+        locations = pd.read_csv(args.locations)[["lat", "lon"]].itertuples(index=False)
+    elif args.lat is not None and args.lon is not None:
+        locations = [(args.lat, args.lon)]
+    else:
+        parser.error("pass --lat and --lon, or --locations")
+
+    # One model per cell is enough, even if several locations share it
+    trained = set()
+    for lat, lon in locations:
+        cell = model_registry.cell(lat, lon)
+        if cell not in trained:
+            train_location(lat, lon, args.epochs, args.model, args.mode)
+            trained.add(cell)
@@ -0,0 +1,113 @@
+import pandas as pd
+import datetime
+import sqlite3
+import os
+
+COLUMNS = ["date", "Temperature", "Rainfall", "Humidity"]
+
+
+def split_range(start_date, end_date, max_days=366):
+    """Splits an inclusive date range into consecutive chunks of at most max_days days."""
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + datetime.timedelta(days=max_days - 1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + datetime.timedelta(days=1)
+    return chunks
+
+
+class WeatherStore:
+    """
+    Local SQLite store of daily weather history, keyed by grid cell and date.
+
+    Coordinates are snapped to a grid of `grid_size` degrees, so nearby locations share
+    one history. Callers read what is stored and fetch only the missing date ranges.
+    """
+
+    def __init__(self, path, grid_size=0.1):
+        self.path = path
+        self.grid_size = grid_size
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS weather_daily ("
+                " cell_lat INTEGER NOT NULL,"
+                " cell_lon INTEGER NOT NULL,"
+                " date TEXT NOT NULL,"
+                " temperature REAL,"
+                " rainfall REAL,"
+                " humidity REAL,"
+                " PRIMARY KEY (cell_lat, cell_lon, date))"
+            )
+
+    def _connect(self):
+        # A connection per call keeps the store safe to use from request threads
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return sqlite3.connect(self.path, timeout=30)
+
+    def cell(self, lat, lon):
+        return (int(round(lat / self.grid_size)), int(round(lon / self.grid_size)))
+
+    def cell_center(self, cell):
+        return (round(cell[0] * self.grid_size, 6), round(cell[1] * self.grid_size, 6))
+
+    def stored_dates(self, cell, start_date, end_date):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date FROM weather_daily WHERE cell_lat = ? AND cell_lon = ? AND date BETWEEN ? AND ?",
+                (cell[0], cell[1], start_date.isoformat(), end_date.isoformat())
+            ).fetchall()
+        return {datetime.date.fromisoformat(row[0]) for row in rows}
+
+    def missing_ranges(self, cell, start_date, end_date):
+        """Inclusive (start, end) date ranges between start_date and end_date with no stored rows."""
+        stored = self.stored_dates(cell, start_date, end_date)
+        ranges = []
+        gap_start = None
+        day = start_date
+        while day <= end_date:
+            if day not in stored and gap_start is None:
+                gap_start = day
+            elif day in stored and gap_start is not None:
+                ranges.append((gap_start, day - datetime.timedelta(days=1)))
+                gap_start = None
+            day += datetime.timedelta(days=1)
+        if gap_start is not None:
+            ranges.append((gap_start, end_date))
+        return ranges
+
+    def append(self, cell, df):
+        """
+        Stores the rows of a date/Temperature/Rainfall/Humidity frame. Days with no values
+        at all (typically recent days the archive has not filled yet) are not stored, so
+        they are fetched again next time.
+        """
+        df = df.dropna(subset=COLUMNS[1:], how="all")
+        if df.empty:
+            return
+        dates = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        rows = [
+            (cell[0], cell[1], date, *(None if pd.isna(value) else float(value) for value in values))
+            for date, values in zip(dates, df[COLUMNS[1:]].itertuples(index=False, name=None))
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO weather_daily"
+                " (cell_lat, cell_lon, date, temperature, rainfall, humidity) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def read(self, cell, start_date, end_date):
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT date, temperature AS Temperature, rainfall AS Rainfall, humidity AS Humidity"
+                " FROM weather_daily WHERE cell_lat = ? AND cell_lon = ? AND date BETWEEN ? AND ?"
+                " ORDER BY date",
+                conn,
+                params=(cell[0], cell[1], start_date.isoformat(), end_date.isoformat())
+            )
+        df["date"] = pd.to_datetime(df["date"])
+        return df